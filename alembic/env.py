@@ -7,7 +7,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.database import Base
-from app.models import user, account, email_verify_code  # 確保導入所有模型
+from app.models import user, account, email_verify_code, audit_log, user_tombstone, campaign, line_outbox  # 確保導入所有模型
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -7,5 +7,142 @@ load_dotenv()
 class Settings:
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "mysecretkey")  # 請改為更安全的值
 
+    # 綁定設定快取（秒 / 筆數）
+    BIND_SETTINGS_CACHE_TTL = float(os.getenv("BIND_SETTINGS_CACHE_TTL", "60"))
+    BIND_SETTINGS_CACHE_SIZE = int(
+        os.getenv("BIND_SETTINGS_CACHE_SIZE", "10000"))
+
+    # 失效使用者排程
+    STALE_USER_JOB_ENABLED = os.getenv(
+        "STALE_USER_JOB_ENABLED", "true").lower() == "true"
+    STALE_USER_UNBOUND_DAYS = int(os.getenv("STALE_USER_UNBOUND_DAYS", "30"))
+    STALE_USER_BATCH_SIZE = int(os.getenv("STALE_USER_BATCH_SIZE", "500"))
+    STALE_USER_BATCH_SLEEP = float(os.getenv("STALE_USER_BATCH_SLEEP", "0.5"))
+    STALE_USER_JOB_INTERVAL = float(
+        os.getenv("STALE_USER_JOB_INTERVAL", "3600"))
+    # 允許執行的時段（本地時間，小時），例如 "0-6" 表示凌晨 0 點到 6 點；留空表示不限
+    STALE_USER_JOB_HOURS = os.getenv("STALE_USER_JOB_HOURS", "0-6")
+
+    # 刪除帳號：使用者數超過門檻時改由背景分批清除
+    ACCOUNT_PURGE_THRESHOLD = int(os.getenv("ACCOUNT_PURGE_THRESHOLD", "5000"))
+    ACCOUNT_PURGE_BATCH_SIZE = int(
+        os.getenv("ACCOUNT_PURGE_BATCH_SIZE", "1000"))
+    ACCOUNT_PURGE_BATCH_SLEEP = float(
+        os.getenv("ACCOUNT_PURGE_BATCH_SLEEP", "0.1"))
+
+    # 帳號明細附加使用者（include=users）的預設 / 最大筆數
+    ACCOUNT_INCLUDE_USERS_LIMIT = int(
+        os.getenv("ACCOUNT_INCLUDE_USERS_LIMIT", "100"))
+    ACCOUNT_INCLUDE_USERS_MAX_LIMIT = int(
+        os.getenv("ACCOUNT_INCLUDE_USERS_MAX_LIMIT", "1000"))
+
+    # 稽核紀錄：批次寫入的間隔（毫秒）/ 每批筆數 / 佇列上限
+    AUDIT_FLUSH_INTERVAL_MS = int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "200"))
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+
+    # Idempotency-Key 回應保存時間（秒）/ 筆數上限
+    IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+    # 使用者增量同步：每頁筆數上限 / 安全延遲（秒），延遲內的變更留待下次同步，避免漏掉尚未提交的交易
+    USER_CHANGES_MAX_LIMIT = int(os.getenv("USER_CHANGES_MAX_LIMIT", "1000"))
+    USER_CHANGES_SAFETY_LAG = float(
+        os.getenv("USER_CHANGES_SAFETY_LAG", "5"))
+    # 使用者刪除紀錄保留天數，由失效使用者排程清除；游標早於此期限的用戶端需重新全量同步
+    USER_TOMBSTONE_RETENTION_DAYS = int(
+        os.getenv("USER_TOMBSTONE_RETENTION_DAYS", "30"))
+
+    # 使用者事件推播：每個訂閱者的緩衝筆數 / 緩衝滿時的處理方式 (drop_oldest 或 disconnect) / 心跳秒數
+    EVENT_SUBSCRIBER_BUFFER = int(os.getenv("EVENT_SUBSCRIBER_BUFFER", "100"))
+    EVENT_SLOW_CONSUMER_POLICY = os.getenv(
+        "EVENT_SLOW_CONSUMER_POLICY", "drop_oldest")
+    EVENT_HEARTBEAT_INTERVAL = float(
+        os.getenv("EVENT_HEARTBEAT_INTERVAL", "15"))
+
+    # 跨 worker 快取失效通知：local 或 postgres (LISTEN/NOTIFY)
+    INVALIDATION_BACKEND = os.getenv("INVALIDATION_BACKEND", "local")
+    INVALIDATION_CHANNEL = os.getenv(
+        "INVALIDATION_CHANNEL", "cache_invalidation")
+
+    # 日誌：等級 / SQL 日誌 (off / info / debug) / 佇列上限 / 存取日誌抽樣 ("路由:比例" 逗號分隔)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    SQL_LOG_LEVEL = os.getenv("SQL_LOG_LEVEL", "off")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_ACCESS_SAMPLE_RATES = os.getenv("LOG_ACCESS_SAMPLE_RATES", "")
+
+    # 請求 profiling：是否啟用 / 隨機抽樣比例 / 取樣間隔（秒）/ 保存筆數
+    PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() == "true"
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+    PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+
+    # 密碼雜湊：bcrypt 成本（所有 worker 相同，可用 benchmarks.password_hash_benchmark 量測建議值）
+    PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+    # 自動校準：依目標驗證時間（毫秒）在校準範圍內選擇成本，結果存入資料庫供所有 worker 共用
+    PASSWORD_AUTO_CALIBRATE = os.getenv(
+        "PASSWORD_AUTO_CALIBRATE", "false").lower() == "true"
+    PASSWORD_TARGET_VERIFY_MS = float(
+        os.getenv("PASSWORD_TARGET_VERIFY_MS", "250"))
+    PASSWORD_BCRYPT_MIN_ROUNDS = int(
+        os.getenv("PASSWORD_BCRYPT_MIN_ROUNDS", "10"))
+    PASSWORD_BCRYPT_MAX_ROUNDS = int(
+        os.getenv("PASSWORD_BCRYPT_MAX_ROUNDS", "16"))
+
+    # 批次 API 單次最多操作數
+    BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "100"))
+
+    # LINE Messaging API：網址（可指向本地替身伺服器）/ 逾時秒數 / 最大同時連線數
+    LINE_API_BASE_URL = os.getenv("LINE_API_BASE_URL", "https://api.line.me")
+    LINE_API_TIMEOUT = float(os.getenv("LINE_API_TIMEOUT", "10"))
+    LINE_API_MAX_CONNECTIONS = int(os.getenv("LINE_API_MAX_CONNECTIONS", "20"))
+
+    # 推播活動排程：每批收件人數（LINE multicast 上限 500）/ 每秒批次數 / 工作租約秒數 / 與資料庫重新同步的間隔
+    CAMPAIGN_ENABLED = os.getenv("CAMPAIGN_ENABLED", "true").lower() == "true"
+    CAMPAIGN_BATCH_SIZE = int(os.getenv("CAMPAIGN_BATCH_SIZE", "500"))
+    CAMPAIGN_BATCHES_PER_SECOND = float(
+        os.getenv("CAMPAIGN_BATCHES_PER_SECOND", "5"))
+    CAMPAIGN_LEASE_SECONDS = int(os.getenv("CAMPAIGN_LEASE_SECONDS", "120"))
+    CAMPAIGN_RESYNC_INTERVAL = float(
+        os.getenv("CAMPAIGN_RESYNC_INTERVAL", "60"))
+
+    # LINE 個人資料：快取秒數 / 快取筆數 / 查無資料（已封鎖或刪除好友）的快取秒數
+    LINE_PROFILE_CACHE_TTL = int(os.getenv("LINE_PROFILE_CACHE_TTL", "3600"))
+    LINE_PROFILE_CACHE_SIZE = int(
+        os.getenv("LINE_PROFILE_CACHE_SIZE", "10000"))
+    LINE_PROFILE_NOT_FOUND_TTL = int(
+        os.getenv("LINE_PROFILE_NOT_FOUND_TTL", "300"))
+
+    # LINE 個人資料回補排程：每批筆數 / 批次間隔秒數 / 排程間隔秒數 / 超過幾天重新同步
+    LINE_PROFILE_BACKFILL_ENABLED = os.getenv(
+        "LINE_PROFILE_BACKFILL_ENABLED", "false").lower() == "true"
+    LINE_PROFILE_BACKFILL_BATCH_SIZE = int(
+        os.getenv("LINE_PROFILE_BACKFILL_BATCH_SIZE", "200"))
+    LINE_PROFILE_BACKFILL_BATCH_SLEEP = float(
+        os.getenv("LINE_PROFILE_BACKFILL_BATCH_SLEEP", "0.5"))
+    LINE_PROFILE_BACKFILL_INTERVAL = int(
+        os.getenv("LINE_PROFILE_BACKFILL_INTERVAL", "3600"))
+    LINE_PROFILE_REFRESH_DAYS = int(
+        os.getenv("LINE_PROFILE_REFRESH_DAYS", "7"))
+
+    # 驗證 Token 的帳號狀態快取：增量更新間隔秒數 / 全量重建間隔秒數（偵測已刪除的帳號）
+    ACCOUNT_STATE_REFRESH_INTERVAL = float(
+        os.getenv("ACCOUNT_STATE_REFRESH_INTERVAL", "10"))
+    ACCOUNT_STATE_FULL_REFRESH_INTERVAL = float(
+        os.getenv("ACCOUNT_STATE_FULL_REFRESH_INTERVAL", "300"))
+
+    # LINE 發送佇列 (outbox)：worker 數 / 每次領取筆數 / 閒置輪詢秒數 / 發送租約秒數
+    OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+    OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+    # 租約需大於一批最久的發送時間：所有 worker 的批次共用 LINE_API_MAX_CONNECTIONS 個連線，
+    # 等待連線的時間不受 LINE_API_TIMEOUT 限制；設定過小時 dispatcher 會自動調高
+    OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+    # 失敗重試：最多嘗試次數 / 退避起始秒數 / 退避上限秒數
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))
+    OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "600"))
+
 
 settings = Settings()
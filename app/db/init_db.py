@@ -1,9 +1,12 @@
+import logging
 from app.utils.password import hash_password
 from app.models.account import Account, BindType, RoleType
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import Base, engine
 
+logger = logging.getLogger(__name__)
+
 
 async def create_tables():
     """
@@ -11,7 +14,7 @@ async def create_tables():
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-        print("所有資料表已成功建立！")
+        logger.info("所有資料表已成功建立！")
 
 
 async def drop_tables():
@@ -20,7 +23,7 @@ async def drop_tables():
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
-        print("所有資料表已成功刪除！")
+        logger.info("所有資料表已成功刪除！")
 
 
 async def init_admin(db: AsyncSession):
@@ -32,7 +35,7 @@ async def init_admin(db: AsyncSession):
     admin_exists = result.scalars().first()
 
     if not admin_exists:
-        print("⚠️ 未檢測到 Admin 帳號，正在創建預設管理員帳號...")
+        logger.warning("⚠️ 未檢測到 Admin 帳號，正在創建預設管理員帳號...")
 
         admin_account = Account(
             email="admin@example.com",
@@ -44,6 +47,6 @@ async def init_admin(db: AsyncSession):
 
         db.add(admin_account)
         await db.commit()
-        print("✅ 預設管理員帳號創建成功！")
+        logger.info("✅ 預設管理員帳號創建成功！")
     else:
-        print("✅ 管理員帳號已存在，無需初始化。")
+        logger.info("✅ 管理員帳號已存在，無需初始化。")
@@ -1,13 +1,35 @@
+import asyncio
+import logging
 from fastapi.routing import APIRoute
 from app.database import engine, SessionLocal
 from app.utils.response import register_exception_handlers
 from fastapi import FastAPI
-from app.routers import users, account
+from app.routers import users, account, bind, admin, events, batch, campaign, line_message
 from app.db.init_db import create_tables, drop_tables, init_admin
+from app.config import settings
+from app.tasks.stale_users import run_stale_user_job
+from app.tasks.campaign_scheduler import campaign_scheduler
+from app.tasks.profile_backfill import run_profile_backfill_job
+from app.tasks.line_outbox import line_outbox
+from app.utils.audit import audit_logger
+from app.utils.invalidation import invalidation_bus
+from app.utils.account_state import account_states
+from app.utils.line_api import line_client
+from app.utils.password import password_policy
+from app.utils.log import setup_logging, shutdown_logging, AccessLogMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.db_metrics import instrument_engine
 from fastapi.exceptions import RequestValidationError
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# 日誌改由背景執行緒輸出，需在其他模組寫日誌前設定
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# 統計各路由的連線佔用與查詢時間
+instrument_engine(engine)
+
 # 定義 lifespan 方法
 
 
@@ -20,18 +42,76 @@ async def lifespan(app: FastAPI):
     # await drop_tables()
     await create_tables()
 
+    # 依目標驗證時間校準密碼雜湊成本（所有 worker 共用資料庫中的校準結果），需在建立管理員前完成
+    if settings.PASSWORD_AUTO_CALIBRATE:
+        async with SessionLocal() as session:
+            await password_policy.calibrate(session, settings.PASSWORD_TARGET_VERIFY_MS)
+
     # 初始化管理員帳號
     async with SessionLocal() as session:
         await init_admin(session)
 
+    # 啟動跨 worker 快取失效通知
+    await invalidation_bus.start()
+
+    # 載入驗證 Token 用的帳號狀態並定期增量更新
+    account_states.start()
+
+    # 啟動稽核紀錄批次寫入
+    audit_logger.start()
+
+    # 啟動背景排程
+    background_tasks = []
+    if settings.STALE_USER_JOB_ENABLED:
+        background_tasks.append(asyncio.create_task(run_stale_user_job()))
+    if settings.LINE_PROFILE_BACKFILL_ENABLED:
+        background_tasks.append(asyncio.create_task(run_profile_backfill_job()))
+
+    # 啟動推播活動排程
+    if settings.CAMPAIGN_ENABLED:
+        campaign_scheduler.start()
+
+    # 啟動 LINE 發送佇列 worker
+    if settings.OUTBOX_ENABLED:
+        line_outbox.start()
+
     yield  # 中間的代碼可以留空，如果無關閉邏輯
     # 關閉時執行的清理操作（可選）
-    print("Application is shutting down")
+    logger.info("Application is shutting down")
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    # 停止推播並釋放執行中活動的租約
+    await campaign_scheduler.stop()
+    await line_outbox.stop()
+    await line_client.close()
+
+    # 寫入剩餘的稽核紀錄
+    await audit_logger.stop()
+
+    await account_states.stop()
+    await invalidation_bus.stop()
+
+    # 寫出剩餘的日誌
+    shutdown_logging()
 
 app = FastAPI(lifespan=lifespan)
 
+# 後加入的 middleware 在外層；profiling 放在存取日誌內層，才能取得 request id
+if settings.PROFILE_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(AccessLogMiddleware)
+
 app.include_router(account.router, prefix="/api", tags=["account"])
 app.include_router(users.router, prefix="/api", tags=["users"])
+app.include_router(bind.router, prefix="/api", tags=["bind"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+app.include_router(events.router, prefix="/api", tags=["events"])
+app.include_router(batch.router, prefix="/api", tags=["batch"])
+app.include_router(campaign.router, prefix="/api", tags=["campaign"])
+app.include_router(line_message.router, prefix="/api", tags=["line_message"])
 
 # 註冊自定義的驗證錯誤處理器
 register_exception_handlers(app)
@@ -1,7 +1,12 @@
 from app.models.user import User
 from app.models.account import Account
 from app.models.email_verify_code import EmailVerifyCode
+from app.models.audit_log import AuditLog
+from app.models.user_tombstone import UserTombstone
+from app.models.campaign import Campaign
+from app.models.line_outbox import LineOutbox
+from app.models.system_setting import SystemSetting
 
 
 # 匯入所有模型
-__all__ = ["User", "Account", "EmailVerifyCode"]
+__all__ = ["User", "Account", "EmailVerifyCode", "AuditLog", "UserTombstone", "Campaign", "LineOutbox", "SystemSetting"]
@@ -57,4 +57,7 @@ class Account(Base):
                   default=RoleType.USER, comment="用戶角色")
 
     # 定義與 User 的一對多關係
-    users = relationship("User", back_populates="account")
+    # passive_deletes：刪除帳號時交由資料庫 ON DELETE CASCADE 處理，不逐筆載入 User
+    # lazy="raise"：需明確使用 selectinload 等載入，避免意外的延遲載入 (N+1)
+    users = relationship("User", back_populates="account", lazy="raise",
+                         cascade="all, delete-orphan", passive_deletes=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, func
+from app.database import Base
+
+
+class AuditLog(Base):
+    __tablename__ = "audit_log"  # 資料表名稱
+    __table_args__ = (
+        Index("ix_audit_log_resource", "resource_type", "resource_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True,
+                nullable=False, comment="流水號 (主鍵)")
+    actor_account_id = Column(Integer, nullable=True, comment="操作者帳號 ID")
+    actor = Column(String(50), nullable=True, comment="操作者 (Token sub)")
+    actor_ip = Column(String(45), nullable=True, comment="操作者 IP")
+    action = Column(String(30), nullable=False, comment="操作類型")
+    resource_type = Column(String(30), nullable=False, comment="資源類型")
+    resource_id = Column(Integer, nullable=True, comment="資源 ID")
+    before = Column(JSON, nullable=True, comment="變更前資料")
+    after = Column(JSON, nullable=True, comment="變更後資料")
+    created_at = Column(DateTime, default=func.now(),
+                        nullable=False, comment="操作時間")
@@ -0,0 +1,59 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, JSON, Index, func
+from app.database import Base
+from app.models.account import BindType
+from app.models.user import UserStatus
+import enum
+
+
+class CampaignStatus(str, enum.Enum):
+    SCHEDULED = "scheduled"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELED = "canceled"
+
+
+class Campaign(Base):
+    __tablename__ = "campaign"  # 資料表名稱
+    __table_args__ = (
+        # 排程器以 (status, scheduled_at) 找出下一個到期的活動
+        Index("ix_campaign_status_scheduled_at", "status", "scheduled_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True,
+                nullable=False, comment="流水號 (主鍵)")
+    account_id = Column(
+        Integer, ForeignKey("account.id", ondelete="CASCADE"), nullable=False
+    )
+    name = Column(String(100), nullable=False, comment="活動名稱")
+    messages = Column(JSON, nullable=False, comment="LINE 訊息物件 (最多 5 則)")
+
+    # 收件對象條件（皆為選填，未填表示不限）
+    target_status = Column(Enum(UserStatus), nullable=True, comment="使用者狀態")
+    target_bind_type = Column(Enum(BindType), nullable=True, comment="綁定類別")
+    target_user_code_prefix = Column(
+        String(30), nullable=True, comment="綁定工號前綴")
+
+    scheduled_at = Column(DateTime, nullable=False, comment="預定發送時間")
+    status = Column(Enum(CampaignStatus, name="campaignstatus_enum"), nullable=False,
+                    default=CampaignStatus.SCHEDULED, comment="活動狀態")
+
+    # 發送進度，重啟後從 last_user_id 之後繼續
+    last_user_id = Column(Integer, nullable=False,
+                          default=0, comment="已處理的最後一位使用者 ID")
+    sent_count = Column(Integer, nullable=False, default=0, comment="成功發送人數")
+    failed_count = Column(Integer, nullable=False,
+                          default=0, comment="發送失敗人數")
+    error = Column(String(500), nullable=True, comment="最後一次錯誤訊息")
+    locked_until = Column(DateTime, nullable=True,
+                          comment="執行租約到期時間（避免多個 worker 同時發送）")
+    claim_token = Column(String(36), nullable=True,
+                         comment="租約識別碼，寫回進度時確認租約未被其他 worker 接手")
+    started_at = Column(DateTime, nullable=True, comment="開始發送時間")
+    finished_at = Column(DateTime, nullable=True, comment="完成時間")
+
+    created_at = Column(DateTime, default=func.now(),
+                        nullable=False, comment="記錄建立時間")
+    created_by = Column(String(30), nullable=True, comment="記錄建立者")
+    updated_at = Column(DateTime, default=func.now(),
+                        onupdate=func.now(), nullable=True, comment="記錄更新時間")
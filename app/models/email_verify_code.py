@@ -11,7 +11,7 @@ class EmailVerifyCode(Base):
     account_id = Column(
         Integer, ForeignKey("account.id", ondelete="CASCADE"), nullable=False
     )
-    user_id = Column(Integer, ForeignKey("user.id"),
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"),
                      nullable=False, comment="對應的用戶 ID")
     email = Column(String(50), unique=True, nullable=False, comment="EMAIL")
     verify_code = Column(String(10), nullable=False, comment="驗證碼")
@@ -21,4 +21,5 @@ class EmailVerifyCode(Base):
                         nullable=True, comment="建立者")
 
     # 定義與 User 的多對一關係
-    user = relationship("User", back_populates="email_verify_codes")
+    user = relationship(
+        "User", back_populates="email_verify_codes", lazy="raise")
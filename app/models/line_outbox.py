@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, JSON, Index, func
+from app.database import Base
+import enum
+
+
+class OutboxKind(str, enum.Enum):
+    PUSH = "push"
+    MULTICAST = "multicast"
+    REPLY = "reply"
+
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class LineOutbox(Base):
+    __tablename__ = "line_outbox"  # 資料表名稱
+    __table_args__ = (
+        # 發送 worker 以 (status, next_attempt_at) 領取到期的訊息
+        Index("ix_line_outbox_status_next_attempt_at",
+              "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True,
+                nullable=False, comment="流水號 (主鍵)")
+    account_id = Column(
+        Integer, ForeignKey("account.id", ondelete="CASCADE"), nullable=False
+    )
+    kind = Column(Enum(OutboxKind, name="outboxkind_enum"),
+                  nullable=False, comment="呼叫類型 push / multicast / reply")
+    payload = Column(JSON, nullable=False, comment="LINE API 請求內容")
+    retry_key = Column(String(36), nullable=False,
+                       comment="X-Line-Retry-Key，重試時避免重複發送")
+    status = Column(Enum(OutboxStatus, name="outboxstatus_enum"), nullable=False,
+                    default=OutboxStatus.PENDING, comment="發送狀態")
+    attempts = Column(Integer, nullable=False, default=0, comment="已嘗試次數")
+    next_attempt_at = Column(DateTime, default=func.now(),
+                             nullable=False, comment="下次可發送時間")
+    locked_until = Column(DateTime, nullable=True,
+                          comment="發送租約到期時間（worker 中斷後可由其他 worker 接手）")
+    claim_token = Column(String(36), nullable=True,
+                         comment="領取批次識別碼，寫回結果時確認租約未被其他 worker 接手")
+    last_error = Column(String(500), nullable=True, comment="最後一次錯誤訊息")
+    created_at = Column(DateTime, default=func.now(),
+                        nullable=False, comment="記錄建立時間")
+    created_by = Column(String(30), nullable=True, comment="記錄建立者")
+    sent_at = Column(DateTime, nullable=True, comment="發送成功時間")
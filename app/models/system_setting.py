@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime, func
+from app.database import Base
+
+
+class SystemSetting(Base):
+    __tablename__ = "system_setting"  # 資料表名稱
+
+    # 所有 worker / 節點共用的執行期設定（例如校準後的密碼雜湊成本）
+    key = Column(String(50), primary_key=True, comment="設定名稱")
+    value = Column(String(300), nullable=False, comment="設定值")
+    updated_at = Column(DateTime, default=func.now(),
+                        onupdate=func.now(), nullable=True, comment="記錄更新時間")
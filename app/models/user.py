@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 import enum
@@ -13,6 +13,18 @@ class UserStatus(enum.Enum):
 
 class User(Base):
     __tablename__ = "user"  # 資料表名稱
+    __table_args__ = (
+        # 綁定流程以 (account_id, line_user_id) 查找使用者
+        Index("ix_user_account_id_line_user_id", "account_id", "line_user_id"),
+        # 失效排程以 (status, created_at) 篩選逾期未綁定的使用者
+        Index("ix_user_status_created_at", "status", "created_at"),
+        # 增量同步以 (modified_at, id) 排序與分頁
+        Index("ix_user_modified_at_id", "modified_at", "id"),
+        Index("ix_user_account_id_modified_at_id",
+              "account_id", "modified_at", "id"),
+        # 推播活動以 (account_id, id) keyset 分批取得收件人
+        Index("ix_user_account_id_id", "account_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True,
                 nullable=False, comment="流水號 (主鍵)")
@@ -22,6 +34,9 @@ class User(Base):
     line_user_id = Column(String(50), nullable=False, comment="LINE USER ID")
     user_code = Column(String(30), nullable=True, comment="綁定工號 (如會員編號)")
     user_name = Column(String(30), nullable=True, comment="綁定姓名")
+    picture_url = Column(String(300), nullable=True, comment="LINE 大頭貼網址")
+    profile_synced_at = Column(DateTime, nullable=True,
+                               comment="最後一次同步 LINE 個人資料的時間")
     bind_type = Column(Enum(BindType), nullable=True,
                        comment="綁定類別 email or secret")
     bind_word = Column(String(50), nullable=True, comment="驗證的Email 或綁定用的暗號")
@@ -36,6 +51,7 @@ class User(Base):
     created_by = Column(String(30), nullable=True, comment="記錄建立者")
 
     # 定義與 account 的多對一關係
-    account = relationship("Account", back_populates="users")
+    account = relationship("Account", back_populates="users", lazy="raise")
     # 定義與 EmailVerifyCode 的一對多關係
-    email_verify_codes = relationship("EmailVerifyCode", back_populates="user")
+    email_verify_codes = relationship("EmailVerifyCode", back_populates="user", lazy="raise",
+                                      cascade="all, delete-orphan", passive_deletes=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
+from app.database import Base
+
+
+class UserTombstone(Base):
+    __tablename__ = "user_tombstone"  # 資料表名稱
+    __table_args__ = (
+        # 增量同步以 (deleted_at, id) 排序與分頁
+        Index("ix_user_tombstone_deleted_at_id", "deleted_at", "id"),
+        Index("ix_user_tombstone_account_id_deleted_at_id",
+              "account_id", "deleted_at", "id"),
+    )
+
+    # 不建立外鍵：帳號或使用者刪除後仍需保留刪除紀錄
+    id = Column(Integer, primary_key=True, autoincrement=True,
+                nullable=False, comment="流水號 (主鍵)")
+    user_id = Column(Integer, nullable=False, comment="已刪除的使用者 ID")
+    account_id = Column(Integer, nullable=False, comment="對應的帳號 ID")
+    line_user_id = Column(String(50), nullable=False, comment="LINE USER ID")
+    deleted_at = Column(DateTime, default=func.now(),
+                        nullable=False, comment="刪除時間")
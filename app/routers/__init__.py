@@ -1,6 +1,12 @@
 from app.routers.users import router as users_router
 from app.routers.account import router as account_router
+from app.routers.bind import router as bind_router
+from app.routers.admin import router as admin_router
+from app.routers.events import router as events_router
+from app.routers.batch import router as batch_router
+from app.routers.campaign import router as campaign_router
+from app.routers.line_message import router as line_message_router
 
 
 # 匯入所有路由
-__all__ = ["users_router", "account_router"]
+__all__ = ["users_router", "account_router", "bind_router", "admin_router", "events_router", "batch_router", "campaign_router", "line_message_router"]
@@ -1,20 +1,38 @@
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated, Optional
 from fastapi.encoders import jsonable_encoder
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import delete, insert, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy.future import select
+from app.config import settings
 from app.models.account import Account
-from app.schemas.account import AccountCreate, AccountResponse, PasswordChange, AccountUpdate, LoginRequest
-from app.database import get_db
+from app.models.user import User
+from app.models.user_tombstone import UserTombstone
+from app.schemas.account import AccountCreate, AccountResponse, PasswordChange, AccountUpdate, LoginRequest, \
+    AccountRow, account_rows_adapter
+from app.schemas.user import UserResponse, UserDetailResponse
+from app.database import get_db, SessionLocal, release_connection, run_after_commit
+from app.tasks.account_purge import get_purge_job, start_purge_job
+from app.tasks.password_rehash import schedule_rehash
+from app.utils.audit import audit_logger
+from app.utils.idempotency import idempotent
+from app.utils.invalidation import invalidation_bus
+from app.utils.include import parse_include
+from app.utils.singleflight import single_flight
 from app.utils.jwt import create_jwt_token, verify_jwt_token, Token
-from app.utils.password import validate_password, hash_password, verify_password
+from app.utils.password import validate_password, hash_password_async, verify_password_async, needs_rehash
 from app.utils.response import success_response, fail_response
 
 router = APIRouter()
 
+# 帳號列表快速路徑查詢的欄位
+ACCOUNT_ROW_COLUMNS = [getattr(Account, name) for name in AccountRow.__annotations__]
+
 
 @router.post("/accounts/", response_model=AccountResponse)
+@idempotent
 async def create_account(account: AccountCreate, request: Request, db: AsyncSession = Depends(get_db),
                          token_data: dict = Depends(verify_jwt_token)):
     """
@@ -30,17 +48,20 @@ async def create_account(account: AccountCreate, request: Request, db: AsyncSess
     client_host = request.client.host
 
     # 檢查 Email 是否已存在
-    query = select(Account).filter(Account.email == account.email)
+    query = select(Account.id).filter(Account.email == account.email)
     result = await db.execute(query)
-    existing_account = result.scalars().first()
+    existing_account = result.first()
 
     if existing_account:
         return fail_response(message="Account already exists", errors={"email": "Email already registered"})
 
     # 驗證密碼格式
     validate_password(account.password)
+
+    # 加密前先歸還連線，避免 bcrypt 計算期間佔用連線池
+    await release_connection(db)
     # 加密密碼
-    account.password = hash_password(account.password)
+    account.password = await hash_password_async(account.password)
 
     # 新增帳號，將所有參數解包並新增 created_by
     new_account = Account(
@@ -54,6 +75,9 @@ async def create_account(account: AccountCreate, request: Request, db: AsyncSess
     response_data = jsonable_encoder(
         AccountResponse.model_validate(new_account))
 
+    audit_logger.record(request, token_data, "create", "account",
+                        new_account.id, after=response_data)
+
     return success_response(
         data=response_data,
         message="Account created successfully"
@@ -70,14 +94,13 @@ async def read_accounts(db: AsyncSession = Depends(get_db),
     if token_data.get("role") != "admin":
         return fail_response(message="您沒有權限執行此操作", status_code=403)
 
-    query = select(Account)
+    # 只查詢需要的欄位，不建立 ORM 物件（不進入 session identity map）
+    query = select(*ACCOUNT_ROW_COLUMNS)
     result = await db.execute(query)
-    accounts = result.scalars().all()
+    accounts = [dict(row) for row in result.mappings()]
 
     # 轉換成 JSON 可序列化的格式
-    response_data = jsonable_encoder(
-        [AccountResponse.model_validate(account) for account in accounts]
-    )
+    response_data = account_rows_adapter.dump_python(accounts, mode="json")
 
     return success_response(
         data=response_data,
@@ -85,16 +108,63 @@ async def read_accounts(db: AsyncSession = Depends(get_db),
     )
 
 
+@single_flight("read_account")
+async def load_account(account_id: int, includes: frozenset, users_limit: int) -> Optional[dict]:
+    """
+    查詢帳號並序列化，相同參數的並發查詢共用一次資料庫查詢
+    - 不做權限檢查，由呼叫端負責
+    """
+    # 查詢帳號
+    query = select(Account).filter(Account.id == account_id)
+
+    if "users" in includes:
+        # 多取一筆用來判斷是否還有更多使用者
+        limited_user_ids = (
+            select(User.id)
+            .filter(User.account_id == account_id)
+            .order_by(User.id)
+            .limit(users_limit + 1)
+        )
+        loader = selectinload(Account.users.and_(
+            User.id.in_(limited_user_ids)))
+        if "verify_codes" in includes:
+            loader = loader.selectinload(User.email_verify_codes)
+        query = query.options(loader)
+
+    async with SessionLocal() as db:
+        result = await db.execute(query)
+        account = result.scalars().first()
+
+        if not account:
+            return None
+
+        response_data = jsonable_encoder(
+            AccountResponse.model_validate(account))
+
+        if "users" in includes:
+            user_schema = UserDetailResponse if "verify_codes" in includes else UserResponse
+            users = sorted(account.users, key=lambda user: user.id)
+            response_data["users"] = jsonable_encoder(
+                [user_schema.model_validate(user) for user in users[:users_limit]])
+            response_data["users_has_more"] = len(users) > users_limit
+
+    return response_data
+
+
 @router.get("/accounts/{account_id}")
 async def read_account(
     account_id: int,
-    db: AsyncSession = Depends(get_db),
+    include: Optional[str] = Query(
+        None, description="附加關聯資料，逗號分隔：users, verify_codes"),
+    users_limit: int = Query(settings.ACCOUNT_INCLUDE_USERS_LIMIT, ge=1,
+                             le=settings.ACCOUNT_INCLUDE_USERS_MAX_LIMIT, description="附加的使用者數量上限"),
     token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並獲取角色
 ):
     """
     查詢單一帳號資料
     - 一般用戶只能查詢自己的帳號
     - 管理員可以查詢所有帳號
+    - include=users 一併回傳使用者（最多 users_limit 筆），include=users,verify_codes 再附上各使用者的驗證碼
     """
     token_account_id = token_data.get("account_id")
     role = token_data.get("role")
@@ -103,15 +173,14 @@ async def read_account(
     if role != "admin" and token_account_id != account_id:
         return fail_response(message="您沒有權限查看其他用戶的資料", status_code=403)
 
-    # 查詢帳號
-    query = select(Account).filter(Account.id == account_id)
-    result = await db.execute(query)
-    account = result.scalars().first()
+    includes = parse_include(include, allowed={"users", "verify_codes"})
+    if includes is None or ("verify_codes" in includes and "users" not in includes):
+        return fail_response(message="Invalid include", errors={"include": "Allowed values: users, users,verify_codes"})
 
-    if not account:
-        return fail_response(message="Account not found", status_code=404)
+    response_data = await load_account(account_id, frozenset(includes), users_limit)
 
-    response_data = jsonable_encoder(AccountResponse.model_validate(account))
+    if response_data is None:
+        return fail_response(message="Account not found", status_code=404)
 
     return success_response(
         data=response_data,
@@ -119,6 +188,37 @@ async def read_account(
     )
 
 
+async def apply_account_update(db: AsyncSession, request: Request, token_data: dict, existing_account: Account,
+                               account_update: AccountUpdate, after_commit: list):
+    """
+    將更新內容套用到已通過權限與密碼檢查的帳號（不提交交易），供單筆 API 與批次 API 共用
+    """
+    account_id = existing_account.id
+
+    # 避免普通用戶修改 `role` `password`
+    update_data = account_update.model_dump(
+        exclude={"role", "password"}, exclude_unset=True)
+
+    before = {field: getattr(existing_account, field) for field in update_data}
+
+    for field, value in update_data.items():
+        setattr(existing_account, field, value)
+
+    existing_account.modified_by = request.client.host
+
+    await db.flush()
+
+    async def on_commit():
+        audit_logger.record(request, token_data, "update", "account",
+                            account_id, before=before, after=update_data)
+
+        # 綁定設定與帳號狀態可能已變更，清除快取
+        await invalidation_bus.publish("bind_settings", account_id)
+        await invalidation_bus.publish("account_state", account_id)
+
+    after_commit.append(on_commit)
+
+
 @router.put("/accounts/{account_id}")
 async def update_account(
     account_id: int,
@@ -146,21 +246,18 @@ async def update_account(
     if not existing_account:
         return fail_response(message="Account not found", status_code=404)
 
-    # 驗證密碼是否正確
-    if role != "admin" and not verify_password(account_update.password, existing_account.password):
-        return fail_response(message="Incorrect password", status_code=403)
-
-    # 避免普通用戶修改 `role` `password`
-    update_data = account_update.model_dump(
-        exclude={"role", "password"}, exclude_unset=True)
+    # 驗證密碼是否正確（驗證前先歸還連線，之後重新加入 session）
+    if role != "admin":
+        await release_connection(db)
+        if not await verify_password_async(account_update.password, existing_account.password):
+            return fail_response(message="Incorrect password", status_code=403)
+        db.add(existing_account)
 
-    for field, value in update_data.items():
-        setattr(existing_account, field, value)
-
-    existing_account.modified_by = request.client.host
+    after_commit = []
+    await apply_account_update(db, request, token_data, existing_account, account_update, after_commit)
 
     await db.commit()
-    await db.refresh(existing_account)
+    await run_after_commit(after_commit)
 
     return success_response(
         data={"account_id": account_id},
@@ -169,10 +266,12 @@ async def update_account(
 
 
 @router.delete("/accounts/{account_id}", response_model=dict)
-async def delete_account(account_id: int, db: AsyncSession = Depends(get_db),
+async def delete_account(account_id: int, request: Request, db: AsyncSession = Depends(get_db),
                          token_data: dict = Depends(verify_jwt_token)):
     """
     刪除帳號資料
+    - 使用者數量少時直接刪除，子資料由資料庫 ON DELETE CASCADE 處理
+    - 使用者數量超過 ACCOUNT_PURGE_THRESHOLD 時先停用帳號，改由背景分批清除並立即回應
     """
     role = token_data.get("role")
     if role != "admin":
@@ -181,6 +280,11 @@ async def delete_account(account_id: int, db: AsyncSession = Depends(get_db),
     if token_data.get("account_id") == account_id:
         return fail_response(message="管理員不能刪除自己的帳號", status_code=403)
 
+    # 已有清除工作在執行中，直接回報進度
+    job = get_purge_job(account_id)
+    if job and job.status == "running":
+        return success_response(data=jsonable_encoder(job.to_dict()), message="Account purge in progress", status_code=202)
+
     query = select(Account).filter(Account.id == account_id)
     result = await db.execute(query)
     account = result.scalars().first()
@@ -188,16 +292,61 @@ async def delete_account(account_id: int, db: AsyncSession = Depends(get_db),
     if not account:
         return fail_response(message="Account not found", status_code=404)
 
-    # 確認刪除操作
-    await db.delete(account)
+    before = jsonable_encoder(AccountResponse.model_validate(account))
+
+    query = select(func.count(User.id)).filter(User.account_id == account_id)
+    result = await db.execute(query)
+    user_count = result.scalar_one()
+
+    if user_count > settings.ACCOUNT_PURGE_THRESHOLD:
+        # 先停用帳號，清除期間不再接受綁定等操作
+        await db.execute(update(Account).where(Account.id == account_id).values(status=False))
+        await db.commit()
+        await invalidation_bus.publish("bind_settings", account_id)
+        await invalidation_bus.publish("account_state", account_id)
+
+        audit_logger.record(request, token_data, "purge", "account",
+                            account_id, before=before)
+
+        job = start_purge_job(account_id, user_count)
+        return success_response(data=jsonable_encoder(job.to_dict()), message="Account purge started", status_code=202)
+
+    # 保留使用者的刪除紀錄供增量同步使用，再刪除帳號（使用者由 ON DELETE CASCADE 刪除）
+    await db.execute(insert(UserTombstone).from_select(
+        ["user_id", "account_id", "line_user_id"],
+        select(User.id, User.account_id, User.line_user_id).filter(
+            User.account_id == account_id)
+    ))
+    await db.execute(delete(Account).where(Account.id == account_id))
     await db.commit()
 
+    await invalidation_bus.publish("bind_settings", account_id)
+    await invalidation_bus.publish("account_state", account_id)
+
+    audit_logger.record(request, token_data, "delete", "account",
+                        account_id, before=before)
+
     return success_response(
-        data={"message": f"Account with ID {account.id} deleted successfully!"},
+        data={"message": f"Account with ID {account_id} deleted successfully!"},
         message="Account deleted successfully"
     )
 
 
+@router.get("/accounts/{account_id}/purge", response_model=dict)
+async def read_purge_job(account_id: int, token_data: dict = Depends(verify_jwt_token)):
+    """
+    查詢帳號背景清除工作的進度
+    """
+    if token_data.get("role") != "admin":
+        return fail_response(message="您沒有權限執行此操作", status_code=403)
+
+    job = get_purge_job(account_id)
+    if not job:
+        return fail_response(message="Purge job not found", status_code=404)
+
+    return success_response(data=jsonable_encoder(job.to_dict()), message="Purge job retrieved successfully")
+
+
 @router.put("/accounts/{account_id}/password", response_model=dict)
 async def change_password(
     account_id: int,
@@ -226,16 +375,21 @@ async def change_password(
     if not account:
         return fail_response(message="Account not found", status_code=404)
 
+    # bcrypt 計算前先歸還連線，之後重新加入 session
+    await release_connection(db)
+
     # 如果是普通用戶，則必須驗證舊密碼
     if role != "admin":
-        if not verify_password(password_data.old_password, account.password):
+        if not await verify_password_async(password_data.old_password, account.password):
             return fail_response(message="Old password is incorrect", status_code=400)
 
     # 驗證新密碼格式
     validate_password(password_data.new_password)
 
     # 更新密碼
-    account.password = hash_password(password_data.new_password)
+    hashed_password = await hash_password_async(password_data.new_password)
+    db.add(account)
+    account.password = hashed_password
 
     # 獲取用戶 IP 地址
     client_host = request.client.host
@@ -245,6 +399,10 @@ async def change_password(
     await db.commit()
     await db.refresh(account)
 
+    # 不記錄密碼內容
+    audit_logger.record(request, token_data,
+                        "change_password", "account", account_id)
+
     return success_response(
         data={},
         message="Password updated successfully"
@@ -257,13 +415,21 @@ async def login(request: LoginRequest, req: Request, db: AsyncSession = Depends(
     """
     使用 Email + Password 登入，成功則回傳 JWT Token
     """
-    query = select(Account).filter(Account.email == request.email)
+    query = select(Account.id, Account.email, Account.password, Account.role).filter(
+        Account.email == request.email)
     result = await db.execute(query)
-    account = result.scalars().first()
+    account = result.first()
+
+    # 驗證密碼前先歸還連線，bcrypt 計算期間不佔用連線池
+    await release_connection(db)
 
-    if not account or not verify_password(request.password, account.password):
+    if not account or not await verify_password_async(request.password, account.password):
         return fail_response(message="帳號或密碼錯誤", status_code=401)
 
+    # 雜湊成本與目前設定不同時，背景重新雜湊
+    if needs_rehash(account.password):
+        schedule_rehash(account.id, request.password, account.password)
+
     # 產生 JWT Token
     token = create_jwt_token({"sub": account.email, "account_id": account.id,
                               "role": account.role.value})
@@ -284,14 +450,20 @@ class CustomOAuth2PasswordRequestForm(OAuth2PasswordRequestForm):
 @router.post("/token", response_model=Token, include_in_schema=False)
 async def login_for_access_token(form_data: Annotated[CustomOAuth2PasswordRequestForm, Depends()], db: AsyncSession = Depends(get_db)):
 
-    query = select(Account).filter(Account.email == form_data.email)
+    query = select(Account.id, Account.email, Account.password, Account.role).filter(
+        Account.email == form_data.email)
     result = await db.execute(query)
 
-    account = result.scalars().first()
+    account = result.first()
 
-    if not account or not verify_password(form_data.password, account.password):
+    await release_connection(db)
+
+    if not account or not await verify_password_async(form_data.password, account.password):
         return fail_response(message="帳號或密碼錯誤", status_code=401)
 
+    if needs_rehash(account.password):
+        schedule_rehash(account.id, form_data.password, account.password)
+
     token = create_jwt_token({"sub": account.email, "account_id": account.id,
                               "role": account.role.value})
     return Token(access_token=token, token_type="bearer")
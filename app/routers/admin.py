@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
+from app.tasks.line_outbox import line_outbox
+from app.utils.account_state import account_states
+from app.utils.db_metrics import route_timing_stats
+from app.utils.events import user_events
+from app.utils.invalidation import invalidation_bus
+from app.utils.jwt import verify_jwt_token
+from app.utils.log import DroppingQueueHandler
+from app.utils.profiling import profile_store, render_profile
+from app.utils.response import success_response, fail_response
+from app.utils.singleflight import single_flight_stats
+
+router = APIRouter()
+
+
+@router.get("/admin/metrics")
+async def read_metrics(token_data: dict = Depends(verify_jwt_token)):
+    """
+    查詢程序內的執行統計（僅限管理員）
+    - single_flight：各讀取路徑實際執行與被合併的請求數
+    - user_events：使用者事件推播的訂閱者數、發布數、丟棄與中斷數
+    - invalidation：跨 worker 快取失效通知的接收數與傳遞延遲
+    - log_dropped：日誌佇列已滿而丟棄的筆數
+    - db_timing：各路由平均連線佔用時間與查詢時間
+    - account_state：驗證 Token 用的帳號狀態快取命中數與更新水位
+    - line_outbox：LINE 發送佇列已發送、重試與失敗的訊息數
+    """
+    if token_data.get("role") != "admin":
+        return fail_response(message="您沒有權限執行此操作", status_code=403)
+
+    return success_response(
+        data={
+            "single_flight": single_flight_stats(),
+            "user_events": user_events.stats(),
+            "invalidation": invalidation_bus.stats(),
+            "log_dropped": DroppingQueueHandler.dropped,
+            "db_timing": route_timing_stats(),
+            "account_state": account_states.stats(),
+            "line_outbox": line_outbox.stats(),
+        },
+        message="Metrics retrieved successfully"
+    )
+
+
+@router.get("/admin/profiles")
+async def read_profiles(token_data: dict = Depends(verify_jwt_token)):
+    """
+    查詢最近的請求 profile 清單（僅限管理員）
+    """
+    if token_data.get("role") != "admin":
+        return fail_response(message="您沒有權限執行此操作", status_code=403)
+
+    return success_response(data=profile_store.list(), message="Profiles retrieved successfully")
+
+
+@router.get("/admin/profiles/{profile_id}")
+async def read_profile(
+    profile_id: str,
+    format: str = Query("html", pattern="^(html|speedscope|text)$",
+                        description="輸出格式：html / speedscope / text"),
+    token_data: dict = Depends(verify_jwt_token)
+):
+    """
+    取得單一請求的 profile 結果（僅限管理員）
+    - html 可直接在瀏覽器查看，speedscope 可匯入 https://www.speedscope.app
+    """
+    if token_data.get("role") != "admin":
+        return fail_response(message="您沒有權限執行此操作", status_code=403)
+
+    profile = profile_store.get(profile_id)
+    if not profile:
+        return fail_response(message="Profile not found", status_code=404)
+
+    output = render_profile(profile, format)
+    if format == "html":
+        return HTMLResponse(output)
+    if format == "speedscope":
+        return Response(output, media_type="application/json")
+    return PlainTextResponse(output)
@@ -0,0 +1,139 @@
+import json
+import logging
+from fastapi import APIRouter, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.database import get_db, run_after_commit
+from app.models.account import Account
+from app.routers.account import apply_account_update
+from app.routers.users import apply_create_user, apply_update_user, apply_delete_user
+from app.schemas.account import AccountUpdate
+from app.schemas.batch import BatchRequest, BatchOperation
+from app.schemas.user import UserCreate, UserUpdate
+from app.utils.idempotency import idempotent
+from app.utils.jwt import verify_jwt_token
+from app.utils.response import success_response, fail_response
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _apply_update_account(db: AsyncSession, request: Request, token_data: dict, account_id: int,
+                                account_update: AccountUpdate, after_commit: list):
+    # 非管理員需驗證密碼 (bcrypt)，不適合在批次交易中進行，請使用 PUT /accounts/{id}
+    if token_data.get("role") != "admin":
+        return fail_response(message="批次更新帳號僅限管理員", status_code=403)
+
+    query = select(Account).filter(Account.id == account_id)
+    result = await db.execute(query)
+    existing_account = result.scalars().first()
+
+    if not existing_account:
+        return fail_response(message="Account not found", status_code=404)
+
+    await apply_account_update(db, request, token_data, existing_account, account_update, after_commit)
+    return {"account_id": account_id}
+
+
+async def _run_operation(db: AsyncSession, request: Request, token_data: dict, operation: BatchOperation,
+                         after_commit: list):
+    """
+    執行單一操作，成功回傳資料，失敗回傳 fail_response
+    """
+    if operation.op != "create_user" and operation.id is None:
+        return fail_response(message="缺少 id", errors={"id": "Field required"})
+
+    data = operation.data or {}
+    try:
+        if operation.op == "create_user":
+            return await apply_create_user(db, request, token_data, UserCreate.model_validate(data), after_commit)
+        if operation.op == "update_user":
+            return await apply_update_user(db, request, token_data, operation.id,
+                                           UserUpdate.model_validate(data), after_commit)
+        if operation.op == "delete_user":
+            return await apply_delete_user(db, request, token_data, operation.id, after_commit)
+        return await _apply_update_account(db, request, token_data, operation.id,
+                                           AccountUpdate.model_validate(data), after_commit)
+    except ValidationError as e:
+        return fail_response(message="Validation Error",
+                             errors=jsonable_encoder(e.errors(include_url=False)), status_code=422)
+
+
+def _db_error(index: int, operation: BatchOperation, e: SQLAlchemyError):
+    """
+    資料庫錯誤只回傳固定訊息，原始錯誤（含約束名稱、SQL 片段）只寫入伺服器日誌
+    """
+    logger.warning(f"批次操作 #{index} ({operation.op}) 資料庫錯誤: {e}")
+    if isinstance(e, IntegrityError):
+        # 例如違反唯一鍵或外鍵
+        return fail_response(message="Conflict with existing data", status_code=409)
+    return fail_response(message="Database error", status_code=500)
+
+
+def _result(index: int, operation: BatchOperation, outcome) -> dict:
+    if isinstance(outcome, JSONResponse):
+        body = json.loads(outcome.body)
+        return {"index": index, "op": operation.op, "ok": False, "status": outcome.status_code,
+                "message": body.get("message"), "errors": body.get("errors")}
+    return {"index": index, "op": operation.op, "ok": True, "status": 200, "data": outcome}
+
+
+@router.post("/batch")
+@idempotent
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 只驗證一次 JWT
+):
+    """
+    在單一 session 與交易中依序執行多個使用者 / 帳號操作，回傳每個操作的結果
+    - atomic=True：任一操作失敗即停止並全部回滾（後續操作標記為 skipped）
+    - atomic=False：每個操作包在 savepoint 中，失敗只回滾該操作，其餘一次提交
+    - 權限檢查與單筆 API 相同
+    """
+    results = []
+    after_commit = []
+
+    for index, operation in enumerate(batch.operations):
+        if batch.atomic:
+            try:
+                outcome = await _run_operation(db, request, token_data, operation, after_commit)
+            except SQLAlchemyError as e:
+                outcome = _db_error(index, operation, e)
+            results.append(_result(index, operation, outcome))
+
+            if isinstance(outcome, JSONResponse):
+                await db.rollback()
+                results.extend(
+                    {"index": skipped_index, "op": skipped.op, "ok": False, "status": None, "message": "skipped"}
+                    for skipped_index, skipped in enumerate(batch.operations[index + 1:], start=index + 1)
+                )
+                return fail_response(message="Batch failed, all operations rolled back",
+                                     errors={"results": results}, status_code=400)
+            continue
+
+        operation_after_commit = []
+        savepoint = await db.begin_nested()
+        try:
+            outcome = await _run_operation(db, request, token_data, operation, operation_after_commit)
+        except SQLAlchemyError as e:
+            # 只回滾此操作
+            outcome = _db_error(index, operation, e)
+
+        if isinstance(outcome, JSONResponse):
+            await savepoint.rollback()
+        else:
+            await savepoint.commit()
+            after_commit.extend(operation_after_commit)
+        results.append(_result(index, operation, outcome))
+
+    await db.commit()
+    await run_after_commit(after_commit)
+
+    return success_response(data={"results": results}, message="Batch executed successfully")
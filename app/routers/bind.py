@@ -0,0 +1,139 @@
+import hmac
+from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import delete, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.account import BindType
+from app.models.email_verify_code import EmailVerifyCode
+from app.models.user import User, UserStatus
+from app.schemas.bind import BindRequest
+from app.schemas.user import UserResponse
+from app.database import get_db
+from app.tasks.profile_backfill import schedule_profile_enrichment
+from app.utils.audit import audit_logger
+from app.utils.bind_settings import get_bind_settings
+from app.utils.events import publish_user_event
+from app.utils.jwt import verify_jwt_token
+from app.utils.response import success_response, fail_response
+
+router = APIRouter()
+
+
+@router.post("/bind")
+async def bind_user(
+    bind_request: BindRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    LINE 使用者綁定
+    - 依帳號的綁定設定（快取）驗證暗號或 Email 驗證碼（驗證碼限該使用者且只能使用一次）
+    - 以單一條件式 UPDATE 將使用者轉為已綁定，重複送出不會重複綁定
+    - 驗證碼在 UPDATE 成功後才在同一個交易中刪除，已綁定的重試不需要驗證碼仍有效
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    # 只有 `admin` 可以綁定其他帳號的使用者，普通用戶只能綁定自己的
+    if role != "admin" and token_account_id != bind_request.account_id:
+        return fail_response(message="您沒有權限綁定其他帳號的使用者", status_code=403)
+
+    bind_settings = await get_bind_settings(db, bind_request.account_id)
+
+    if not bind_settings:
+        return fail_response(message="Account not found", status_code=404)
+
+    if not bind_settings.status:
+        return fail_response(message="帳號已停用", status_code=403)
+
+    if bind_settings.bind_type == BindType.SECRET:
+        if not bind_settings.bind_word or not hmac.compare_digest(
+                bind_settings.bind_word.encode("utf-8"), bind_request.bind_word.encode("utf-8")):
+            return fail_response(message="綁定暗號錯誤", errors={"bind_word": "Incorrect bind word"})
+
+    elif bind_settings.bind_type == BindType.EMAIL:
+        if not bind_request.verify_code:
+            return fail_response(message="缺少 Email 驗證碼", errors={"verify_code": "Verify code is required"})
+
+    else:
+        return fail_response(message="帳號尚未設定綁定類型", status_code=400)
+
+    values = {
+        "status": UserStatus.BOUND,
+        "bind_type": bind_settings.bind_type,
+        "bind_word": bind_request.bind_word,
+        "bind_date": func.now(),
+        "modified_by": request.client.host,  # 記錄修改者的 IP 地址
+    }
+    if bind_request.user_code is not None:
+        values["user_code"] = bind_request.user_code
+    if bind_request.user_name is not None:
+        values["user_name"] = bind_request.user_name
+
+    # 只更新尚未綁定的使用者，並發或重試的請求只會有一個成功轉換狀態
+    stmt = (
+        update(User)
+        .where(
+            (User.account_id == bind_request.account_id) &
+            (User.line_user_id == bind_request.line_user_id) &
+            (User.status != UserStatus.BOUND)
+        )
+        .values(**values)
+        .returning(User)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    bound_user = result.scalars().first()
+
+    if bound_user and bind_settings.bind_type == BindType.EMAIL:
+        # 驗證碼只能用於綁定的使用者，並與綁定在同一個交易中刪除，無法重複使用
+        stmt = (
+            delete(EmailVerifyCode)
+            .where(
+                (EmailVerifyCode.account_id == bind_request.account_id) &
+                (EmailVerifyCode.user_id == bound_user.id) &
+                (EmailVerifyCode.email == bind_request.bind_word) &
+                (EmailVerifyCode.verify_code == bind_request.verify_code) &
+                (EmailVerifyCode.efficient_time >= func.now())
+            )
+            .returning(EmailVerifyCode.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        if result.first() is None:
+            await db.rollback()
+            return fail_response(message="驗證碼錯誤或已過期", errors={"verify_code": "Invalid or expired verify code"})
+
+    if bound_user:
+        # commit 後物件會過期，先序列化再提交
+        response_data = jsonable_encoder(UserResponse.model_validate(bound_user))
+        await db.commit()
+
+        audit_logger.record(request, token_data, "bind", "user",
+                            response_data["id"], after=response_data)
+        publish_user_event("user.bound", response_data["account_id"], response_data)
+        # 背景補上 LINE 顯示名稱與大頭貼
+        schedule_profile_enrichment(response_data["id"])
+        return success_response(data=response_data, message="User bound successfully")
+
+    await db.rollback()
+
+    # 未更新任何資料：使用者不存在，或已綁定（重試）
+    query = select(User).filter(
+        (User.account_id == bind_request.account_id) &
+        (User.line_user_id == bind_request.line_user_id)
+    )
+    result = await db.execute(query)
+    existing_user = result.scalars().first()
+
+    if not existing_user:
+        return fail_response(message="User not found", status_code=404)
+
+    if existing_user.bind_word != bind_request.bind_word:
+        return fail_response(message="User already bound", status_code=409)
+
+    response_data = jsonable_encoder(UserResponse.model_validate(existing_user))
+
+    return success_response(data=response_data, message="User already bound")
@@ -0,0 +1,157 @@
+from typing import Optional
+from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.account import Account
+from app.models.campaign import Campaign, CampaignStatus
+from app.schemas.campaign import CampaignCreate, CampaignResponse
+from app.database import get_db
+from app.tasks.campaign_scheduler import campaign_scheduler
+from app.utils.audit import audit_logger
+from app.utils.idempotency import idempotent
+from app.utils.jwt import verify_jwt_token
+from app.utils.response import success_response, fail_response
+
+router = APIRouter()
+
+
+@router.post("/campaigns/", response_model=CampaignResponse)
+@idempotent
+async def create_campaign(
+    campaign: CampaignCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    新增推播活動，於 scheduled_at 時發送給符合條件的使用者
+    - 只有 `admin` 可以替其他帳號新增活動
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    if role != "admin" and token_account_id != campaign.account_id:
+        return fail_response(message="您沒有權限新增其他帳號的推播活動", status_code=403)
+
+    query = select(Account.channel_token).filter(Account.id == campaign.account_id)
+    result = await db.execute(query)
+    account = result.first()
+
+    if not account:
+        return fail_response(message="Account not found", status_code=404)
+    if not account.channel_token:
+        return fail_response(message="Account has no channel token",
+                             errors={"account_id": "LINE Channel Token not configured"})
+
+    new_campaign = Campaign(
+        **campaign.model_dump(),
+        created_by=request.client.host
+    )
+    db.add(new_campaign)
+    await db.commit()
+    await db.refresh(new_campaign)
+
+    response_data = jsonable_encoder(CampaignResponse.model_validate(new_campaign))
+
+    campaign_scheduler.schedule(new_campaign.id, new_campaign.scheduled_at)
+    audit_logger.record(request, token_data, "create", "campaign",
+                        new_campaign.id, after=response_data)
+
+    return success_response(data=response_data, message="Campaign created successfully")
+
+
+@router.get("/campaigns/")
+async def read_campaigns(
+    status: Optional[CampaignStatus] = Query(None, description="依活動狀態篩選"),
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    查詢推播活動列表
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    query = select(Campaign)
+    if role != "admin":
+        query = query.filter(Campaign.account_id == token_account_id)
+    if status is not None:
+        query = query.filter(Campaign.status == status)
+    query = query.order_by(Campaign.scheduled_at.desc(), Campaign.id.desc())
+    result = await db.execute(query)
+    campaigns = result.scalars().all()
+
+    response_data = jsonable_encoder(
+        [CampaignResponse.model_validate(campaign) for campaign in campaigns])
+
+    return success_response(data=response_data, message="Campaigns retrieved successfully")
+
+
+@router.get("/campaigns/{campaign_id}")
+async def read_campaign(
+    campaign_id: int,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    查詢單一推播活動與發送進度
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    query = select(Campaign).filter(Campaign.id == campaign_id)
+    result = await db.execute(query)
+    campaign = result.scalars().first()
+
+    if not campaign or (role != "admin" and campaign.account_id != token_account_id):
+        return fail_response(message="Campaign not found or access denied", status_code=404)
+
+    response_data = jsonable_encoder(CampaignResponse.model_validate(campaign))
+
+    return success_response(data=response_data, message="Campaign retrieved successfully")
+
+
+@router.delete("/campaigns/{campaign_id}")
+async def cancel_campaign(
+    campaign_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    取消推播活動
+    - 尚未發送或發送中的活動都可取消，發送中的活動會在目前批次結束後停止
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    query = select(Campaign.account_id).filter(Campaign.id == campaign_id)
+    result = await db.execute(query)
+    campaign = result.first()
+
+    if not campaign or (role != "admin" and campaign.account_id != token_account_id):
+        return fail_response(message="Campaign not found or access denied", status_code=404)
+
+    stmt = (
+        update(Campaign)
+        .where(Campaign.id == campaign_id,
+               Campaign.status.in_([CampaignStatus.SCHEDULED, CampaignStatus.RUNNING]))
+        .values(status=CampaignStatus.CANCELED, locked_until=None, claim_token=None)
+        .returning(Campaign)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    canceled = result.scalars().first()
+
+    if not canceled:
+        return fail_response(message="Campaign already finished", status_code=409)
+
+    # 提交後物件會過期，先序列化
+    response_data = jsonable_encoder(CampaignResponse.model_validate(canceled))
+    await db.commit()
+
+    audit_logger.record(request, token_data, "cancel", "campaign", campaign_id)
+
+    return success_response(data=response_data, message="Campaign canceled successfully")
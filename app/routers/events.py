@@ -0,0 +1,105 @@
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.utils.events import user_events, ALL_ACCOUNTS
+from app.utils.jwt import verify_jwt_token
+from app.utils.response import fail_response
+
+router = APIRouter()
+
+
+def _resolve_topic(token_data: dict, account_id: Optional[int]):
+    """
+    決定訂閱的主題
+    - 一般用戶只能訂閱自己的帳號
+    - 管理員可指定帳號，未指定時訂閱所有帳號
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    if role == "admin":
+        return account_id if account_id is not None else ALL_ACCOUNTS
+    if account_id is not None and account_id != token_account_id:
+        return None
+    return token_account_id
+
+
+@router.get("/events/users")
+async def stream_user_events(
+    request: Request,
+    account_id: Optional[int] = Query(None, description="訂閱的帳號 ID（僅管理員可指定其他帳號）"),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    以 Server-Sent Events 推播使用者新增/修改/刪除/綁定事件
+    - 閒置時定期送出心跳註解，維持連線並偵測斷線
+    """
+    topic = _resolve_topic(token_data, account_id)
+    if topic is None:
+        return fail_response(message="您沒有權限訂閱其他帳號的事件", status_code=403)
+
+    subscription = user_events.subscribe(topic)
+
+    async def event_stream():
+        try:
+            while not subscription.closed:
+                event = await subscription.get(settings.EVENT_HEARTBEAT_INTERVAL)
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws/users")
+async def websocket_user_events(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None, description="JWT Token（瀏覽器無法設定標頭時使用）"),
+    account_id: Optional[int] = Query(None, description="訂閱的帳號 ID（僅管理員可指定其他帳號）"),
+):
+    """
+    以 WebSocket 推播使用者事件，Token 可放在 Authorization 標頭或 token 參數
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+
+    try:
+        token_data = await verify_jwt_token(token or "")
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+
+    topic = _resolve_topic(token_data, account_id)
+    if topic is None:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    subscription = user_events.subscribe(topic)
+
+    try:
+        while not subscription.closed:
+            event = await subscription.get(settings.EVENT_HEARTBEAT_INTERVAL)
+            if event is None:
+                await websocket.send_json({"type": "ping"})
+                continue
+            await websocket.send_json(event)
+
+        # 被判定為過慢的訂閱者
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
@@ -0,0 +1,78 @@
+from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.account import Account
+from app.models.line_outbox import LineOutbox
+from app.schemas.line_message import LineMessageCreate, LineMessageResponse
+from app.database import get_db
+from app.tasks.line_outbox import enqueue_line_message, line_outbox
+from app.utils.idempotency import idempotent
+from app.utils.jwt import verify_jwt_token
+from app.utils.response import success_response, fail_response
+
+router = APIRouter()
+
+
+@router.post("/messages/", response_model=LineMessageResponse)
+@idempotent
+async def create_message(
+    message: LineMessageCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    發送 LINE 訊息（push / multicast / reply）
+    - 寫入發送佇列後立即回應 202，由背景 worker 發送，以 GET /messages/{id} 查詢發送狀態
+    - 只有 `admin` 可以使用其他帳號發送
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    if role != "admin" and token_account_id != message.account_id:
+        return fail_response(message="您沒有權限使用其他帳號發送訊息", status_code=403)
+
+    query = select(Account.channel_token).filter(Account.id == message.account_id)
+    result = await db.execute(query)
+    account = result.first()
+
+    if not account:
+        return fail_response(message="Account not found", status_code=404)
+    if not account.channel_token:
+        return fail_response(message="Account has no channel token",
+                             errors={"account_id": "LINE Channel Token not configured"})
+
+    outbox_message = enqueue_line_message(
+        db, message.account_id, message.kind, message.to_payload(), created_by=request.client.host)
+    await db.commit()
+    await db.refresh(outbox_message)
+
+    response_data = jsonable_encoder(LineMessageResponse.model_validate(outbox_message))
+    line_outbox.wake()
+
+    return success_response(data=response_data, message="Message queued", status_code=202)
+
+
+@router.get("/messages/{message_id}")
+async def read_message(
+    message_id: int,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    查詢 LINE 訊息的發送狀態
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    query = select(LineOutbox).filter(LineOutbox.id == message_id)
+    result = await db.execute(query)
+    outbox_message = result.scalars().first()
+
+    if not outbox_message or (role != "admin" and outbox_message.account_id != token_account_id):
+        return fail_response(message="Message not found or access denied", status_code=404)
+
+    response_data = jsonable_encoder(LineMessageResponse.model_validate(outbox_message))
+
+    return success_response(data=response_data, message="Message retrieved successfully")
@@ -1,26 +1,41 @@
+from datetime import timedelta
 from fastapi.encoders import jsonable_encoder
-from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import Optional, Union
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlalchemy.future import select
+from app.config import settings
 from app.models.user import User, UserStatus, BindType
-from app.schemas.user import UserCreate, UserResponse, UserUpdate
-from app.database import get_db
+from app.models.user_tombstone import UserTombstone
+from app.schemas.user import UserCreate, UserResponse, UserDetailResponse, UserUpdate, UserRow, user_rows_adapter, \
+    UserTombstoneRow, user_tombstone_rows_adapter
+from app.database import get_db, SessionLocal, run_after_commit, db_now
+from app.utils.audit import audit_logger
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.events import publish_user_event
+from app.utils.idempotency import idempotent
+from app.utils.include import parse_include
+from app.utils.singleflight import single_flight
 from app.utils.jwt import verify_jwt_token
 from app.utils.response import success_response, fail_response
 
 router = APIRouter()
 
+# 使用者列表快速路徑查詢的欄位
+USER_ROW_COLUMNS = [getattr(User, name) for name in UserRow.__annotations__]
+USER_TOMBSTONE_ROW_COLUMNS = [getattr(UserTombstone, name)
+                              for name in UserTombstoneRow.__annotations__]
 
-@router.post("/users/", response_model=UserResponse)
-async def create_user(
-    user: UserCreate,
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
-):
+
+async def apply_create_user(db: AsyncSession, request: Request, token_data: dict, user: UserCreate,
+                            after_commit: list) -> Union[dict, JSONResponse]:
     """
-    新增使用者資料
-    - 驗證是否有重複的Account 與 LINE uid
+    新增使用者（不提交交易），供單筆 API 與批次 API 共用
+    - 成功回傳使用者資料，失敗回傳 fail_response
+    - 提交後才執行的動作（稽核、事件）加入 after_commit
     """
     token_account_id = token_data.get("account_id")
     role = token_data.get("role")
@@ -47,11 +62,40 @@ async def create_user(
         created_by=client_host
     )
     db.add(new_user)
-    await db.commit()
+    await db.flush()
     await db.refresh(new_user)
 
     response_data = jsonable_encoder(UserResponse.model_validate(new_user))
 
+    def on_commit():
+        audit_logger.record(request, token_data, "create", "user",
+                            response_data["id"], after=response_data)
+        publish_user_event("user.created", response_data["account_id"], response_data)
+
+    after_commit.append(on_commit)
+    return response_data
+
+
+@router.post("/users/", response_model=UserResponse)
+@idempotent
+async def create_user(
+    user: UserCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    新增使用者資料
+    - 驗證是否有重複的Account 與 LINE uid
+    """
+    after_commit = []
+    response_data = await apply_create_user(db, request, token_data, user, after_commit)
+    if isinstance(response_data, JSONResponse):
+        return response_data
+
+    await db.commit()
+    await run_after_commit(after_commit)
+
     return success_response(data=response_data, message="User created successfully")
 
 
@@ -66,53 +110,148 @@ async def read_users(
     token_account_id = token_data.get("account_id")
     role = token_data.get("role")
 
-    query = select(User)
+    # 只查詢需要的欄位，不建立 ORM 物件（不進入 session identity map）
+    query = select(*USER_ROW_COLUMNS)
     if role != "admin":
         query = query.filter(User.account_id == token_account_id)
     result = await db.execute(query)
-    users = result.scalars().all()
+    users = [dict(row) for row in result.mappings()]
 
-    response_data = jsonable_encoder(
-        [UserResponse.model_validate(user) for user in users]
-    )
+    response_data = user_rows_adapter.dump_python(users, mode="json")
 
     return success_response(data=response_data, message="Users retrieved successfully")
 
 
-@router.get("/users/{user_id}")
-async def read_user(
-    user_id: int,
+@router.get("/users/changes")
+async def read_user_changes(
+    since: Optional[str] = Query(
+        None, description="上次同步回傳的 next_cursor，留空表示從頭開始"),
+    limit: int = Query(500, ge=1, le=settings.USER_CHANGES_MAX_LIMIT,
+                       description="每頁筆數上限"),
     db: AsyncSession = Depends(get_db),
     token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
 ):
     """
-    查詢單一使用者資料
+    增量同步：回傳游標之後新增/修改的使用者 (changes) 與已刪除的使用者 (deleted)
+    - 以 since=next_cursor 取得下一批，has_more 為 True 時應立即再呼叫一次
+    - 最近 USER_CHANGES_SAFETY_LAG 秒內的變更留待下次同步，避免漏掉尚未提交的交易
+    - 刪除紀錄只保留 USER_TOMBSTONE_RETENTION_DAYS 天，游標早於保留期限時回傳 410，需重新全量同步
     """
     token_account_id = token_data.get("account_id")
     role = token_data.get("role")
 
-    query = select(User).filter(User.id == user_id)
+    positions = {"users": None, "deleted": None}
+    if since:
+        positions = decode_cursor(since)
+        if positions is None or set(positions) != {"users", "deleted"}:
+            return fail_response(message="Invalid cursor", errors={"since": "Invalid cursor"})
+
+    now = await db_now(db)
+    upper_bound = now - timedelta(seconds=settings.USER_CHANGES_SAFETY_LAG)
+
+    # 游標之後的刪除紀錄可能已被清除（舊版游標沒有刪除紀錄的位置）
+    if since:
+        retention_cutoff = now - timedelta(days=settings.USER_TOMBSTONE_RETENTION_DAYS)
+        if positions["deleted"] is None or positions["deleted"][0] < retention_cutoff:
+            return fail_response(message="Cursor expired, full resync required", status_code=410,
+                                 errors={"since": "Cursor is older than the tombstone retention window"})
+
+    query = select(*USER_ROW_COLUMNS).filter(User.modified_at < upper_bound)
+    if role != "admin":
+        query = query.filter(User.account_id == token_account_id)
+    if positions["users"]:
+        query = query.filter(
+            tuple_(User.modified_at, User.id) > positions["users"])
+    query = query.order_by(User.modified_at, User.id).limit(limit + 1)
     result = await db.execute(query)
-    user = result.scalars().first()
+    users = [dict(row) for row in result.mappings()]
 
-    if not user or (role != "admin" and user.account_id != token_account_id):
-        return fail_response(message="User not found or access denied", status_code=404)
+    query = select(*USER_TOMBSTONE_ROW_COLUMNS).filter(
+        UserTombstone.deleted_at < upper_bound)
+    if role != "admin":
+        query = query.filter(UserTombstone.account_id == token_account_id)
+    if positions["deleted"]:
+        query = query.filter(
+            tuple_(UserTombstone.deleted_at, UserTombstone.id) > positions["deleted"])
+    query = query.order_by(UserTombstone.deleted_at,
+                           UserTombstone.id).limit(limit + 1)
+    result = await db.execute(query)
+    deleted = [dict(row) for row in result.mappings()]
+
+    # 多取的一筆只用來判斷是否還有資料
+    has_more = len(users) > limit or len(deleted) > limit
+    deleted_exhausted = len(deleted) <= limit
+    users = users[:limit]
+    deleted = deleted[:limit]
+
+    if users:
+        positions["users"] = (users[-1]["modified_at"], users[-1]["id"])
+    if deleted_exhausted:
+        # 刪除紀錄已讀完，位置推進到本次的上限，長時間沒有刪除的用戶端不會被判定為游標過期
+        positions["deleted"] = (upper_bound, 0)
+    else:
+        positions["deleted"] = (deleted[-1]["deleted_at"], deleted[-1]["id"])
+
+    response_data = {
+        "changes": user_rows_adapter.dump_python(users, mode="json"),
+        "deleted": user_tombstone_rows_adapter.dump_python(deleted, mode="json"),
+        "next_cursor": encode_cursor(positions),
+        "has_more": has_more,
+    }
+
+    return success_response(data=response_data, message="User changes retrieved successfully")
+
+
+@single_flight("read_user")
+async def load_user(user_id: int, includes: frozenset) -> Optional[dict]:
+    """
+    查詢使用者並序列化，相同參數的並發查詢共用一次資料庫查詢
+    - 不做權限檢查，由呼叫端依回傳的 account_id 判斷
+    """
+    query = select(User).filter(User.id == user_id)
+    if "verify_codes" in includes:
+        query = query.options(selectinload(User.email_verify_codes))
 
-    response_data = jsonable_encoder(UserResponse.model_validate(user))
+    async with SessionLocal() as db:
+        result = await db.execute(query)
+        user = result.scalars().first()
 
-    return success_response(data=response_data, message="User retrieved successfully")
+        if not user:
+            return None
 
+        user_schema = UserDetailResponse if "verify_codes" in includes else UserResponse
+        return jsonable_encoder(user_schema.model_validate(user))
 
-@router.put("/users/{user_id}")
-async def update_user(
+
+@router.get("/users/{user_id}")
+async def read_user(
     user_id: int,
-    user_update: UserUpdate,
-    request: Request,
-    db: AsyncSession = Depends(get_db),
+    include: Optional[str] = Query(None, description="附加關聯資料：verify_codes"),
     token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
 ):
     """
-    更新使用者資料
+    查詢單一使用者資料
+    - include=verify_codes 一併回傳 Email 驗證碼
+    """
+    token_account_id = token_data.get("account_id")
+    role = token_data.get("role")
+
+    includes = parse_include(include, allowed={"verify_codes"})
+    if includes is None:
+        return fail_response(message="Invalid include", errors={"include": "Allowed values: verify_codes"})
+
+    response_data = await load_user(user_id, frozenset(includes))
+
+    if not response_data or (role != "admin" and response_data["account_id"] != token_account_id):
+        return fail_response(message="User not found or access denied", status_code=404)
+
+    return success_response(data=response_data, message="User retrieved successfully")
+
+
+async def apply_update_user(db: AsyncSession, request: Request, token_data: dict, user_id: int,
+                            user_update: UserUpdate, after_commit: list) -> Union[dict, JSONResponse]:
+    """
+    更新使用者（不提交交易），供單筆 API 與批次 API 共用
     """
     token_account_id = token_data.get("account_id")
     role = token_data.get("role")
@@ -124,29 +263,56 @@ async def update_user(
     if not existing_user or (role != "admin" and existing_user.account_id != token_account_id):
         return fail_response(message="User not found or access denied", status_code=404)
 
-    for field, value in user_update.model_dump(exclude_unset=True).items():
+    update_data = user_update.model_dump(exclude_unset=True)
+    before = {field: getattr(existing_user, field) for field in update_data}
+
+    for field, value in update_data.items():
         setattr(existing_user, field, value)
 
     client_host = request.client.host
     existing_user.modified_by = client_host
 
-    await db.commit()
+    await db.flush()
     await db.refresh(existing_user)
 
     response_data = jsonable_encoder(
         UserResponse.model_validate(existing_user))
 
-    return success_response(data=response_data, message="User updated successfully")
+    def on_commit():
+        audit_logger.record(request, token_data, "update", "user",
+                            user_id, before=before, after=update_data)
+        publish_user_event("user.updated", response_data["account_id"], response_data)
 
+    after_commit.append(on_commit)
+    return response_data
 
-@router.delete("/users/{user_id}", response_model=dict)
-async def delete_user(
+
+@router.put("/users/{user_id}")
+async def update_user(
     user_id: int,
+    user_update: UserUpdate,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
 ):
     """
-    刪除使用者資料
+    更新使用者資料
+    """
+    after_commit = []
+    response_data = await apply_update_user(db, request, token_data, user_id, user_update, after_commit)
+    if isinstance(response_data, JSONResponse):
+        return response_data
+
+    await db.commit()
+    await run_after_commit(after_commit)
+
+    return success_response(data=response_data, message="User updated successfully")
+
+
+async def apply_delete_user(db: AsyncSession, request: Request, token_data: dict, user_id: int,
+                            after_commit: list) -> Union[dict, JSONResponse]:
+    """
+    刪除使用者（不提交交易），供單筆 API 與批次 API 共用
     """
     token_account_id = token_data.get("account_id")
     role = token_data.get("role")
@@ -158,7 +324,39 @@ async def delete_user(
     if not user or (role != "admin" and user.account_id != token_account_id):
         return fail_response(message="User not found or access denied", status_code=404)
 
+    before = jsonable_encoder(UserResponse.model_validate(user))
+
     await db.delete(user)
+    # 保留刪除紀錄供增量同步使用
+    db.add(UserTombstone(user_id=user.id, account_id=user.account_id,
+                         line_user_id=user.line_user_id))
+    await db.flush()
+
+    def on_commit():
+        audit_logger.record(request, token_data, "delete",
+                            "user", user_id, before=before)
+        publish_user_event("user.deleted", before["account_id"], before)
+
+    after_commit.append(on_commit)
+    return {"message": f"User with ID {user_id} deleted successfully!"}
+
+
+@router.delete("/users/{user_id}", response_model=dict)
+async def delete_user(
+    user_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token_data: dict = Depends(verify_jwt_token)  # 驗證 JWT 並提取 token 資訊
+):
+    """
+    刪除使用者資料
+    """
+    after_commit = []
+    response_data = await apply_delete_user(db, request, token_data, user_id, after_commit)
+    if isinstance(response_data, JSONResponse):
+        return response_data
+
     await db.commit()
+    await run_after_commit(after_commit)
 
-    return success_response(data={"message": f"User with ID {user.id} deleted successfully!"}, message="User deleted successfully")
+    return success_response(data=response_data, message="User deleted successfully")
@@ -1,6 +1,7 @@
 import enum
-from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional
+from pydantic import BaseModel, Field, EmailStr, TypeAdapter, field_validator
+from typing_extensions import TypedDict
+from typing import Optional, List
 from datetime import datetime
 from app.models.account import BindType, RoleType
 
@@ -68,6 +69,32 @@ class AccountResponse(BaseModel):
         from_attributes = True
 
 
+class AccountRow(TypedDict):
+    """
+    帳號列表快速路徑的資料列結構
+    - 欄位與 AccountResponse 相同，資料直接來自資料庫，只序列化不再驗證（email 不經 EmailStr 檢查）
+    """
+    id: int
+    manager_name: Optional[str]
+    tel: Optional[str]
+    ext: Optional[str]
+    email: Optional[str]
+    channel_token: Optional[str]
+    channel_secret: Optional[str]
+    bind_type: Optional[BindType]
+    bind_word: Optional[str]
+    status: bool
+    created_at: datetime
+    created_by: Optional[str]
+    updated_at: Optional[datetime]
+    modified_by: Optional[str]
+    role: RoleType
+
+
+# 預先建立的序列化器，避免每次請求重新建構 schema
+account_rows_adapter = TypeAdapter(List[AccountRow])
+
+
 class PasswordChange(BaseModel):
     old_password: str = Field(..., description="舊密碼")
     new_password: str = Field(..., min_length=8,
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Literal, Optional
+from app.config import settings
+
+
+class BatchOperation(BaseModel):
+    """
+    批次中的單一操作
+    - create_user：data 為 UserCreate
+    - update_user：id 為使用者 ID，data 為 UserUpdate
+    - delete_user：id 為使用者 ID
+    - update_account：id 為帳號 ID，data 為 AccountUpdate（僅限管理員）
+    """
+    op: Literal["create_user", "update_user", "delete_user", "update_account"] = Field(
+        ..., description="操作類型")
+    id: Optional[int] = Field(None, description="目標使用者或帳號 ID")
+    data: Optional[dict[str, Any]] = Field(None, description="操作內容")
+
+
+class BatchRequest(BaseModel):
+    """
+    批次請求結構
+    """
+    operations: List[BatchOperation] = Field(
+        ..., min_length=1, max_length=settings.BATCH_MAX_OPERATIONS, description="依序執行的操作")
+    atomic: bool = Field(
+        True, description="True：任一操作失敗則全部回滾；False：每個操作使用 savepoint，失敗只回滾該操作")
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class BindRequest(BaseModel):
+    """
+    LINE 使用者綁定請求結構
+    - 帳號綁定類型為 secret 時，bind_word 為綁定暗號
+    - 帳號綁定類型為 email 時，bind_word 為 Email，並需附上 verify_code
+    """
+    account_id: int = Field(..., description="對應的帳號 ID")
+    line_user_id: str = Field(..., max_length=50, description="LINE USER ID")
+    bind_word: str = Field(..., max_length=50, description="綁定暗號或 Email")
+    verify_code: Optional[str] = Field(
+        None, max_length=10, description="Email 驗證碼 (email 綁定時必填)")
+    user_code: Optional[str] = Field(
+        None, max_length=30, description="綁定工號 (如會員編號)")
+    user_name: Optional[str] = Field(None, max_length=30, description="綁定姓名")
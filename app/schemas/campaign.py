@@ -0,0 +1,59 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Optional, List
+from datetime import datetime
+from app.models.account import BindType
+from app.models.campaign import CampaignStatus
+from app.models.user import UserStatus
+
+
+class CampaignCreate(BaseModel):
+    """
+    新增推播活動的結構
+    """
+    account_id: int = Field(..., description="對應的帳號 ID")
+    name: str = Field(..., max_length=100, description="活動名稱")
+    messages: List[dict[str, Any]] = Field(..., min_length=1, max_length=5,
+                                           description="LINE 訊息物件，例如 {\"type\": \"text\", \"text\": \"...\"}")
+    target_status: Optional[UserStatus] = Field(
+        UserStatus.BOUND, description="收件使用者狀態，留空表示不限")
+    target_bind_type: Optional[BindType] = Field(
+        None, description="收件使用者綁定類別，留空表示不限")
+    target_user_code_prefix: Optional[str] = Field(
+        None, max_length=30, description="收件使用者綁定工號前綴，留空表示不限")
+    scheduled_at: datetime = Field(..., description="預定發送時間")
+
+    @field_validator("scheduled_at")
+    @classmethod
+    def to_local_naive(cls, value: datetime) -> datetime:
+        # 資料庫以本地時間（不含時區）儲存，帶時區的輸入先轉為本地時間
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+
+
+class CampaignResponse(BaseModel):
+    """
+    用於回應的推播活動資料結構
+    """
+    id: int
+    account_id: int
+    name: str
+    messages: List[dict[str, Any]]
+    target_status: Optional[UserStatus] = None
+    target_bind_type: Optional[BindType] = None
+    target_user_code_prefix: Optional[str] = None
+    scheduled_at: datetime
+    status: CampaignStatus
+    last_user_id: int
+    sent_count: int
+    failed_count: int
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    created_by: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
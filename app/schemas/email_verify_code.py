@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class EmailVerifyCodeResponse(BaseModel):
+    """
+    用於回應的 Email 驗證碼資料結構
+    - 不包含驗證碼本身，驗證碼是 Email 綁定的憑證，不可經由 API 讀取
+    """
+    id: int = Field(..., description="流水號")
+    account_id: int = Field(..., description="對應的帳號 ID")
+    user_id: int = Field(..., description="對應的用戶 ID")
+    email: str = Field(..., description="EMAIL")
+    efficient_time: datetime = Field(..., description="有效時間")
+    created_at: datetime = Field(..., description="建立時間")
+    created_by: Optional[str] = Field(None, description="建立者")
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
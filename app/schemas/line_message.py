@@ -0,0 +1,58 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Optional, List, Union
+from datetime import datetime
+from app.models.line_outbox import OutboxKind, OutboxStatus
+
+
+class LineMessageCreate(BaseModel):
+    """
+    新增 LINE 訊息發送的結構
+    - push：to 為單一 LINE USER ID
+    - multicast：to 為 LINE USER ID 陣列（最多 500 位）
+    - reply：需提供 reply_token
+    """
+    account_id: int = Field(..., description="發送訊息的帳號 ID")
+    kind: OutboxKind = Field(..., description="發送方式 push / multicast / reply")
+    to: Optional[Union[str, List[str]]] = Field(None, description="收件者 LINE USER ID")
+    reply_token: Optional[str] = Field(None, description="回覆用的 reply token")
+    messages: List[dict[str, Any]] = Field(..., min_length=1, max_length=5,
+                                           description="LINE 訊息物件，例如 {\"type\": \"text\", \"text\": \"...\"}")
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if self.kind == OutboxKind.PUSH and not isinstance(self.to, str):
+            raise ValueError("push 需提供單一收件者 to")
+        if self.kind == OutboxKind.MULTICAST and (not isinstance(self.to, list) or not 1 <= len(self.to) <= 500):
+            raise ValueError("multicast 需提供 1 ~ 500 位收件者 to")
+        if self.kind == OutboxKind.REPLY and not self.reply_token:
+            raise ValueError("reply 需提供 reply_token")
+        return self
+
+    def to_payload(self) -> dict:
+        """
+        轉為 LINE API 的請求內容
+        """
+        if self.kind == OutboxKind.REPLY:
+            return {"replyToken": self.reply_token, "messages": self.messages}
+        return {"to": self.to, "messages": self.messages}
+
+
+class LineMessageResponse(BaseModel):
+    """
+    用於回應的 LINE 訊息發送狀態
+    """
+    id: int
+    account_id: int
+    kind: OutboxKind
+    payload: dict[str, Any]
+    status: OutboxStatus
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    created_by: Optional[str] = None
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
@@ -1,9 +1,11 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing_extensions import TypedDict
+from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 from app.models.account import BindType
 from app.models.user import UserStatus
+from app.schemas.email_verify_code import EmailVerifyCodeResponse
 
 
 class UserCreate(BaseModel):
@@ -32,6 +34,7 @@ class UserResponse(BaseModel):
     line_user_id: str = Field(..., description="LINE USER ID")
     user_code: Optional[str] = Field(None, description="綁定工號 (如會員編號)")
     user_name: Optional[str] = Field(None, description="綁定姓名")
+    picture_url: Optional[str] = Field(None, description="LINE 大頭貼網址")
     bind_type: BindType = Field(..., description="綁定類型 (email or secret)")
     bind_word: Optional[str] = Field(None, description="驗證的Email 或綁定用的暗號")
     status: Optional[UserStatus] = Field(
@@ -47,6 +50,53 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class UserDetailResponse(UserResponse):
+    """
+    包含 Email 驗證碼的使用者資料結構（include=verify_codes）
+    """
+    email_verify_codes: List[EmailVerifyCodeResponse] = Field(
+        default_factory=list, description="Email 驗證碼")
+
+
+class UserRow(TypedDict):
+    """
+    使用者列表快速路徑的資料列結構
+    - 欄位與 UserResponse 相同，資料直接來自資料庫，只序列化不再驗證
+    """
+    id: int
+    account_id: int
+    line_user_id: str
+    user_code: Optional[str]
+    user_name: Optional[str]
+    picture_url: Optional[str]
+    bind_type: Optional[BindType]
+    bind_word: Optional[str]
+    status: Optional[UserStatus]
+    bind_date: Optional[datetime]
+    modified_at: Optional[datetime]
+    modified_by: Optional[str]
+    created_at: datetime
+    created_by: Optional[str]
+
+
+# 預先建立的序列化器，避免每次請求重新建構 schema
+user_rows_adapter = TypeAdapter(List[UserRow])
+
+
+class UserTombstoneRow(TypedDict):
+    """
+    已刪除使用者的紀錄（增量同步用）
+    """
+    id: int
+    user_id: int
+    account_id: int
+    line_user_id: str
+    deleted_at: datetime
+
+
+user_tombstone_rows_adapter = TypeAdapter(List[UserTombstoneRow])
+
+
 class UserUpdate(BaseModel):
     """
     用於更新使用者資料的結構
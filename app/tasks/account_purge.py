@@ -0,0 +1,123 @@
+import asyncio
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import delete, insert
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.account import Account
+from app.models.email_verify_code import EmailVerifyCode
+from app.models.user import User
+from app.models.user_tombstone import UserTombstone
+
+
+@dataclass
+class PurgeJob:
+    """
+    帳號清除工作的進度
+    """
+    account_id: int
+    total_users: int
+    deleted_users: int = 0
+    deleted_verify_codes: int = 0
+    status: str = "running"  # running / completed / failed
+    error: Optional[str] = None
+    started_at: datetime = field(
+        default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        # 不使用 asdict：asdict 會深複製每個欄位，asyncio.Task 無法複製
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.name != "task"}
+
+
+# 以 account_id 為鍵保存清除工作（僅限本程序）
+_purge_jobs: dict[int, PurgeJob] = {}
+
+
+def get_purge_job(account_id: int) -> Optional[PurgeJob]:
+    return _purge_jobs.get(account_id)
+
+
+async def _delete_in_batches(model, account_id: int, batch_size: int, batch_sleep: float, on_progress) -> None:
+    """
+    依 id 分批刪除屬於該帳號的資料，每批一個短交易
+    - 刪除使用者時同一交易內寫入刪除紀錄 (UserTombstone)，供增量同步使用
+    """
+    while True:
+        batch_ids = (
+            select(model.id)
+            .filter(model.account_id == account_id)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        stmt = delete(model).where(model.id.in_(batch_ids)).execution_options(
+            synchronize_session=False)
+        if model is User:
+            stmt = stmt.returning(User.id, User.account_id, User.line_user_id)
+
+        async with SessionLocal() as session:
+            result = await session.execute(stmt)
+            if model is User:
+                rows = result.all()
+                deleted_count = len(rows)
+                if rows:
+                    await session.execute(insert(UserTombstone), [
+                        {"user_id": row.id, "account_id": row.account_id,
+                            "line_user_id": row.line_user_id}
+                        for row in rows
+                    ])
+            else:
+                deleted_count = result.rowcount
+            await session.commit()
+
+        on_progress(deleted_count)
+        if deleted_count < batch_size:
+            break
+
+        await asyncio.sleep(batch_sleep)
+
+
+async def _purge_account(job: PurgeJob):
+    batch_size = settings.ACCOUNT_PURGE_BATCH_SIZE
+    batch_sleep = settings.ACCOUNT_PURGE_BATCH_SLEEP
+
+    def on_verify_codes_deleted(count: int):
+        job.deleted_verify_codes += count
+
+    def on_users_deleted(count: int):
+        job.deleted_users += count
+
+    try:
+        await _delete_in_batches(EmailVerifyCode, job.account_id, batch_size, batch_sleep,
+                                 on_verify_codes_deleted)
+        await _delete_in_batches(User, job.account_id, batch_size, batch_sleep,
+                                 on_users_deleted)
+
+        async with SessionLocal() as session:
+            await session.execute(delete(Account).where(Account.id == job.account_id))
+            await session.commit()
+
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.now(timezone.utc)
+
+
+def start_purge_job(account_id: int, total_users: int) -> PurgeJob:
+    """
+    啟動背景清除工作；同一帳號已有執行中的工作時直接回傳該工作
+    - 中途失敗或程序重啟時，帳號仍保持停用，重新呼叫刪除即可從剩餘資料繼續
+    """
+    job = _purge_jobs.get(account_id)
+    if job and job.status == "running":
+        return job
+
+    job = PurgeJob(account_id=account_id, total_users=total_users)
+    job.task = asyncio.create_task(_purge_account(job))
+    _purge_jobs[account_id] = job
+    return job
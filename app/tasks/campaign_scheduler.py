@@ -0,0 +1,355 @@
+import asyncio
+import heapq
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import update, and_, or_, func
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal, db_now
+from app.models.account import Account
+from app.models.campaign import Campaign, CampaignStatus
+from app.models.user import User
+from app.utils.line_api import line_client, LineApiError
+
+logger = logging.getLogger(__name__)
+
+# 可重試錯誤（429、5xx、連線錯誤）的重試次數與起始退避秒數
+SEND_RETRIES = 3
+SEND_BACKOFF = 1.0
+
+# 批次的 X-Line-Retry-Key 由 (活動 ID, 批次起點) 推導，租約被接手後重送同一批仍是同一個 key
+RETRY_KEY_NAMESPACE = uuid.UUID("5f0c8d7e-2b1a-4c3e-9a6f-0d4b7e1c2a93")
+
+
+def recipient_conditions(campaign: Campaign) -> list:
+    """
+    依活動的收件對象條件組成查詢條件，未設定的條件不限制
+    """
+    conditions = [User.account_id == campaign.account_id]
+    if campaign.target_status is not None:
+        conditions.append(User.status == campaign.target_status)
+    if campaign.target_bind_type is not None:
+        conditions.append(User.bind_type == campaign.target_bind_type)
+    if campaign.target_user_code_prefix:
+        conditions.append(User.user_code.startswith(
+            campaign.target_user_code_prefix, autoescape=True))
+    return conditions
+
+
+def lease_seconds() -> float:
+    """
+    租約至少為最壞情況下一批發送時間的兩倍
+    - 一批最多嘗試 SEND_RETRIES + 1 次，每次最久 LINE_API_TIMEOUT 秒，加上中間的退避時間
+    """
+    worst_case = (SEND_RETRIES + 1) * line_client.timeout + SEND_BACKOFF * (2 ** SEND_RETRIES - 1)
+    return max(settings.CAMPAIGN_LEASE_SECONDS, worst_case * 2)
+
+
+def batch_retry_key(campaign_id: int, last_user_id: int) -> str:
+    return str(uuid.uuid5(RETRY_KEY_NAMESPACE, f"{campaign_id}:{last_user_id}"))
+
+
+async def claim_campaign(campaign_id: int) -> Optional[str]:
+    """
+    以條件式 UPDATE 取得活動的執行租約，多個 worker 同時嘗試時只有一個會成功
+    - 預定時間已到且尚未開始，或執行中但租約已過期（前一個 worker 中斷）
+    - 時間以資料庫時鐘為準，與其他 worker 寫入的 locked_until 比較
+
+    Returns:
+        Optional[str]: 取得租約時回傳 claim_token，之後寫回進度都需帶上；未取得為 None
+    """
+    claim_token = str(uuid.uuid4())
+    async with SessionLocal() as session:
+        now = await db_now(session)
+        stmt = (
+            update(Campaign)
+            .where(
+                Campaign.id == campaign_id,
+                Campaign.scheduled_at <= now,
+                or_(
+                    Campaign.status == CampaignStatus.SCHEDULED,
+                    and_(Campaign.status == CampaignStatus.RUNNING,
+                         or_(Campaign.locked_until.is_(None), Campaign.locked_until < now)),
+                ),
+            )
+            .values(status=CampaignStatus.RUNNING,
+                    locked_until=now + timedelta(seconds=lease_seconds()),
+                    claim_token=claim_token,
+                    started_at=func.coalesce(Campaign.started_at, now))
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        await session.commit()
+    return claim_token if result.rowcount == 1 else None
+
+
+async def finish_campaign(campaign_id: int, claim_token: str, status: CampaignStatus, error: Optional[str] = None):
+    """
+    結束活動並釋放租約；租約已被其他 worker 接手時不做任何修改
+    """
+    stmt = (
+        update(Campaign)
+        .where(Campaign.id == campaign_id, Campaign.status == CampaignStatus.RUNNING,
+               Campaign.claim_token == claim_token)
+        .values(status=status, error=error, locked_until=None, claim_token=None, finished_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    async with SessionLocal() as session:
+        await session.execute(stmt)
+        await session.commit()
+
+
+async def release_campaign(campaign_id: int, claim_token: str):
+    """
+    停止發送時釋放租約，重啟後（或其他 worker）可立即接手
+    """
+    stmt = (
+        update(Campaign)
+        .where(Campaign.id == campaign_id, Campaign.status == CampaignStatus.RUNNING,
+               Campaign.claim_token == claim_token)
+        .values(locked_until=None, claim_token=None)
+        .execution_options(synchronize_session=False)
+    )
+    async with SessionLocal() as session:
+        await session.execute(stmt)
+        await session.commit()
+
+
+async def send_batch(channel_token: str, line_user_ids: list, messages: list, retry_key: str) -> Optional[str]:
+    """
+    以 multicast 發送一批，可重試的錯誤依指數退避重試
+    - 每批使用同一個 X-Line-Retry-Key，LINE 已接受但回應遺失時重試不會重複發送（回傳 409 視為成功）
+    - 租約過期由其他 worker 接手時，同一批會以相同的 retry_key 重送，同樣不會重複發送
+
+    Returns:
+        Optional[str]: 失敗時的錯誤訊息，成功為 None
+
+    Raises:
+        LineApiError: 401/403，channel_token 無效，後續批次也不會成功
+    """
+    delay = SEND_BACKOFF
+    for attempt in range(SEND_RETRIES + 1):
+        try:
+            await line_client.multicast(channel_token, line_user_ids, messages, retry_key=retry_key)
+            return None
+        except LineApiError as e:
+            if e.status_code == 409:
+                return None
+            if e.status_code in (401, 403):
+                raise
+            if not e.retryable or attempt == SEND_RETRIES:
+                return f"{e.status_code}: {e}"
+        await asyncio.sleep(delay)
+        delay *= 2
+
+
+async def dispatch_campaign(campaign_id: int) -> None:
+    """
+    發送一個到期的推播活動
+    - 以 (account_id, id) keyset 分批取得收件人，不一次載入全部使用者
+    - 每批發送後寫回進度並延長租約，中斷後可從 last_user_id 之後繼續
+    - 依 CAMPAIGN_BATCHES_PER_SECOND 限制發送速率
+    - 寫回進度的條件式 UPDATE 需符合 claim_token：活動在發送中被取消，或租約過期已由其他 worker 接手時
+      不會成功，即停止發送
+    """
+    claim_token = await claim_campaign(campaign_id)
+    if claim_token is None:
+        return
+
+    try:
+        await _send_campaign(campaign_id, claim_token)
+    except asyncio.CancelledError:
+        await release_campaign(campaign_id, claim_token)
+        raise
+    except Exception as e:
+        logger.exception(f"推播活動 {campaign_id} 發送失敗: {e}")
+        await finish_campaign(campaign_id, claim_token, CampaignStatus.FAILED, str(e)[:500])
+
+
+async def _send_campaign(campaign_id: int, claim_token: str) -> None:
+    query = (
+        select(Campaign, Account.channel_token)
+        .join(Account, Account.id == Campaign.account_id)
+        .filter(Campaign.id == campaign_id)
+    )
+    async with SessionLocal() as session:
+        result = await session.execute(query)
+        campaign, channel_token = result.first()
+
+    if not channel_token:
+        await finish_campaign(campaign_id, claim_token, CampaignStatus.FAILED, "帳號未設定 channel_token")
+        return
+
+    logger.info(f"開始發送推播活動 {campaign_id}，從使用者 ID {campaign.last_user_id} 之後繼續")
+
+    conditions = recipient_conditions(campaign)
+    batch_size = settings.CAMPAIGN_BATCH_SIZE
+    batch_interval = 1 / settings.CAMPAIGN_BATCHES_PER_SECOND
+    last_user_id = campaign.last_user_id
+    loop = asyncio.get_running_loop()
+
+    try:
+        while True:
+            started = loop.time()
+
+            query = (
+                select(User.id, User.line_user_id)
+                .filter(*conditions, User.id > last_user_id)
+                .order_by(User.id)
+                .limit(batch_size)
+            )
+            async with SessionLocal() as session:
+                result = await session.execute(query)
+                rows = result.all()
+
+            if not rows:
+                break
+
+            error = await send_batch(channel_token, [row.line_user_id for row in rows], campaign.messages,
+                                     batch_retry_key(campaign_id, last_user_id))
+            last_user_id = rows[-1].id
+
+            async with SessionLocal() as session:
+                now = await db_now(session)
+                stmt = (
+                    update(Campaign)
+                    .where(Campaign.id == campaign_id, Campaign.status == CampaignStatus.RUNNING,
+                           Campaign.claim_token == claim_token)
+                    .values(
+                        last_user_id=last_user_id,
+                        sent_count=Campaign.sent_count + (0 if error else len(rows)),
+                        failed_count=Campaign.failed_count + (len(rows) if error else 0),
+                        error=error if error else Campaign.error,
+                        locked_until=now + timedelta(seconds=lease_seconds()),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                result = await session.execute(stmt)
+                await session.commit()
+
+            if result.rowcount == 0:
+                logger.info(f"推播活動 {campaign_id} 已取消或已由其他 worker 接手，停止發送")
+                return
+
+            if len(rows) < batch_size:
+                break
+
+            await asyncio.sleep(max(0.0, batch_interval - (loop.time() - started)))
+    except LineApiError as e:
+        await finish_campaign(campaign_id, claim_token, CampaignStatus.FAILED, f"{e.status_code}: {e}")
+        return
+
+    await finish_campaign(campaign_id, claim_token, CampaignStatus.COMPLETED)
+    logger.info(f"推播活動 {campaign_id} 發送完成")
+
+
+class CampaignScheduler:
+    """
+    推播活動排程器
+    - 以 min-heap 保存 (到期時間, 活動 ID)，只在最近一個活動到期時喚醒，不定時輪詢每筆活動
+    - 活動狀態與進度都存在資料庫，啟動時及每 CAMPAIGN_RESYNC_INTERVAL 秒重建 heap，
+      因此重啟後會繼續未完成的活動，也會取得其他 worker 新增的活動
+    - 同一活動由資料庫租約保證只有一個 worker 發送
+    - heap 中的到期時間來自資料庫，同步時記錄資料庫與本機時鐘的差距，比較時換算成資料庫時間
+    """
+
+    def __init__(self, resync_interval: float):
+        self.resync_interval = resync_interval
+        self._heap: list = []
+        self._wakeup = asyncio.Event()
+        self._running: dict[int, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._clock_offset = timedelta(0)
+
+    def schedule(self, campaign_id: int, due_at: datetime):
+        """
+        加入新的活動並喚醒排程器重新計算下一次到期時間
+        """
+        heapq.heappush(self._heap, (due_at, campaign_id))
+        self._wakeup.set()
+
+    async def _resync(self):
+        query = select(Campaign.id, Campaign.status, Campaign.scheduled_at, Campaign.locked_until).filter(
+            Campaign.status.in_([CampaignStatus.SCHEDULED, CampaignStatus.RUNNING]))
+        async with SessionLocal() as session:
+            result = await session.execute(query)
+            rows = result.all()
+            self._clock_offset = await db_now(session) - datetime.now()
+
+        heap = []
+        for row in rows:
+            due_at = row.scheduled_at
+            # 執行中的活動在租約到期後才能接手
+            if row.status == CampaignStatus.RUNNING and row.locked_until:
+                due_at = max(due_at, row.locked_until)
+            heap.append((due_at, row.id))
+        heapq.heapify(heap)
+        self._heap = heap
+
+    def _dispatch(self, campaign_id: int):
+        if campaign_id in self._running:
+            return
+
+        task = asyncio.create_task(self._run_campaign(campaign_id))
+        self._running[campaign_id] = task
+        task.add_done_callback(lambda _: self._running.pop(campaign_id, None))
+
+    async def _run_campaign(self, campaign_id: int):
+        try:
+            await dispatch_campaign(campaign_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 取得租約前的錯誤（例如資料庫連線失敗），下次同步後重試
+            logger.exception(f"推播活動 {campaign_id} 發送失敗: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_resync = loop.time()
+
+        while True:
+            if loop.time() >= next_resync:
+                try:
+                    await self._resync()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.exception(f"推播活動排程同步失敗: {e}")
+                next_resync = loop.time() + self.resync_interval
+
+            now = datetime.now() + self._clock_offset
+            while self._heap and self._heap[0][0] <= now:
+                _, campaign_id = heapq.heappop(self._heap)
+                self._dispatch(campaign_id)
+
+            timeout = next_resync - loop.time()
+            if self._heap:
+                timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, timeout))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        停止排程；執行中的活動在取消時釋放租約，重啟後（或其他 worker）可立即接手
+        """
+        if self._task is None:
+            return
+
+        tasks = [self._task, *self._running.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+
+campaign_scheduler = CampaignScheduler(resync_interval=settings.CAMPAIGN_RESYNC_INTERVAL)
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import math
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import update, bindparam, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal, db_now
+from app.models.account import Account
+from app.models.line_outbox import LineOutbox, OutboxKind, OutboxStatus
+from app.utils.line_api import line_client, LineApiError
+
+logger = logging.getLogger(__name__)
+
+_outbox_table = LineOutbox.__table__
+
+# 以主鍵逐筆寫回發送結果的 executemany 語句
+# - 只在租約仍屬於本次領取時寫回；租約過期已被其他 worker 接手的結果直接捨棄
+_apply_result_stmt = (
+    update(_outbox_table)
+    .where(
+        _outbox_table.c.id == bindparam("b_id"),
+        _outbox_table.c.status == OutboxStatus.SENDING,
+        _outbox_table.c.claim_token == bindparam("b_token"),
+    )
+    .values(
+        status=bindparam("b_status"),
+        next_attempt_at=bindparam("b_next_attempt_at"),
+        last_error=bindparam("b_last_error"),
+        sent_at=bindparam("b_sent_at"),
+        locked_until=None,
+        claim_token=None,
+    )
+)
+
+
+def _result_params(result: dict, now: datetime) -> dict:
+    """
+    將發送結果轉為寫回參數，下次重試時間與發送時間以資料庫時鐘 now 計算
+    - 與 next_attempt_at 的預設值（DEFAULT now()）及領取時的比較使用同一個時鐘
+    """
+    sent = result["b_status"] == OutboxStatus.SENT
+    return {
+        "b_id": result["b_id"],
+        "b_token": result["b_token"],
+        "b_status": result["b_status"],
+        "b_next_attempt_at": now + timedelta(seconds=result["retry_delay"]),
+        "b_last_error": result["b_last_error"],
+        "b_sent_at": now if sent else None,
+    }
+
+
+def enqueue_line_message(db: AsyncSession, account_id: int, kind: OutboxKind, payload: dict,
+                         created_by: Optional[str] = None) -> LineOutbox:
+    """
+    將 LINE API 呼叫寫入 outbox（不提交交易）
+    - 與觸發的資料變更在同一個交易提交，交易回滾時訊息也不會送出
+    - 提交後由背景 worker 發送，請求不需等待 LINE 回應；提交後可呼叫 line_outbox.wake() 立即處理
+    - reply 不支援 X-Line-Retry-Key，為避免重複送達，結果不明（逾時、5xx、worker 中斷）時不重送
+    - payload 為 LINE API 的請求內容，push: {to, messages}、multicast: {to: [...], messages}、
+      reply: {replyToken, messages}
+    """
+    message = LineOutbox(
+        account_id=account_id,
+        kind=kind,
+        payload=payload,
+        retry_key=str(uuid.uuid4()),
+        created_by=created_by,
+    )
+    db.add(message)
+    return message
+
+
+async def send_line_message(channel_token: str, kind: OutboxKind, payload: dict, retry_key: str):
+    if kind == OutboxKind.PUSH:
+        await line_client.push(channel_token, payload["to"], payload["messages"], retry_key=retry_key)
+    elif kind == OutboxKind.MULTICAST:
+        await line_client.multicast(channel_token, payload["to"], payload["messages"], retry_key=retry_key)
+    else:
+        await line_client.reply(channel_token, payload["replyToken"], payload["messages"])
+
+
+def backoff_delay(attempts: int) -> float:
+    """
+    指數退避並加上隨機抖動，避免大量失敗的訊息在同一時間重試
+    """
+    delay = min(settings.OUTBOX_BACKOFF_BASE * (2 ** (attempts - 1)), settings.OUTBOX_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class LineOutboxDispatcher:
+    """
+    LINE 發送佇列的背景 worker pool
+    - 每個 worker 以 SELECT ... FOR UPDATE SKIP LOCKED 領取一批到期的訊息並標記為 sending（短交易），
+      多個 worker / 程序同時領取不會拿到同一筆
+    - 發送期間不佔用資料庫連線；發送結果以一次 executemany 寫回
+    - 領取時設定租約與領取識別碼並累加嘗試次數，worker 中斷後租約到期的訊息會被重新領取；
+      寫回結果時比對識別碼，已被其他 worker 接手的訊息不會被舊的結果覆蓋
+    - push / multicast 帶 X-Line-Retry-Key，重新發送不會重複送達；reply 沒有 retry key，
+      租約到期或結果不明時標記為 failed，只有 429（確定未被處理）才重試
+    - 可重試的錯誤（429、5xx、連線錯誤）依指數退避重試，超過 OUTBOX_MAX_ATTEMPTS 次或不可重試時標記為 failed
+    """
+
+    def __init__(self, workers: int, batch_size: int, poll_interval: float, account_id: Optional[int] = None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.account_id = account_id  # 只處理指定帳號的訊息（效能測試用）
+        self.lease_seconds = self._lease_seconds()
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def _lease_seconds(self) -> float:
+        """
+        租約至少為最壞情況下一批發送時間的兩倍
+        - 所有 worker 的批次共用 line_client 的連線數上限，最後一個請求要等前面幾輪都結束，
+          等待連線的時間不受 timeout 限制
+        """
+        rounds = math.ceil(self.workers * self.batch_size / line_client.max_connections)
+        worst_case = rounds * line_client.timeout
+        if settings.OUTBOX_LEASE_SECONDS >= worst_case * 2:
+            return settings.OUTBOX_LEASE_SECONDS
+
+        logger.warning(f"OUTBOX_LEASE_SECONDS={settings.OUTBOX_LEASE_SECONDS} 小於一批最久發送時間 "
+                       f"{worst_case:.0f} 秒的兩倍，改用 {worst_case * 2:.0f} 秒")
+        return worst_case * 2
+
+    def wake(self):
+        """
+        通知 worker 有新的訊息，不必等到下一次輪詢
+        """
+        self._wakeup.set()
+
+    async def _claim(self) -> list:
+        claim_token = str(uuid.uuid4())
+        async with SessionLocal() as session:
+            # 租約與重試時間都以資料庫時鐘為準，各 worker 與 DEFAULT now() 使用同一個時鐘
+            now = await db_now(session)
+
+            # 租約過期的 reply 可能已送達，沒有 retry key 無法安全重送
+            abandoned_replies = (
+                update(LineOutbox)
+                .where(LineOutbox.status == OutboxStatus.SENDING, LineOutbox.kind == OutboxKind.REPLY,
+                       LineOutbox.locked_until < now)
+                .values(status=OutboxStatus.FAILED, locked_until=None, claim_token=None,
+                        last_error="發送中斷，無法確認 reply 是否已送達，不重送")
+                .execution_options(synchronize_session=False)
+            )
+            claimable = select(LineOutbox.id).filter(or_(
+                and_(LineOutbox.status == OutboxStatus.PENDING, LineOutbox.next_attempt_at <= now),
+                and_(LineOutbox.status == OutboxStatus.SENDING, LineOutbox.locked_until < now,
+                     LineOutbox.kind != OutboxKind.REPLY),
+            ))
+            if self.account_id is not None:
+                abandoned_replies = abandoned_replies.where(LineOutbox.account_id == self.account_id)
+                claimable = claimable.filter(LineOutbox.account_id == self.account_id)
+            claimable = (
+                claimable
+                .order_by(LineOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            stmt = (
+                update(LineOutbox)
+                .where(LineOutbox.id.in_(claimable))
+                .values(status=OutboxStatus.SENDING,
+                        locked_until=now + timedelta(seconds=self.lease_seconds),
+                        claim_token=claim_token,
+                        attempts=LineOutbox.attempts + 1)
+                .returning(LineOutbox.id, LineOutbox.account_id, LineOutbox.kind, LineOutbox.payload,
+                           LineOutbox.retry_key, LineOutbox.attempts, LineOutbox.claim_token)
+                .execution_options(synchronize_session=False)
+            )
+
+            tokens = {}
+            await session.execute(abandoned_replies)
+            result = await session.execute(stmt)
+            rows = result.all()
+            if rows:
+                query = select(Account.id, Account.channel_token).filter(
+                    Account.id.in_({row.account_id for row in rows}))
+                result = await session.execute(query)
+                tokens = {row.id: row.channel_token for row in result}
+            await session.commit()
+
+        return [(row, tokens.get(row.account_id)) for row in rows]
+
+    async def _deliver(self, row, channel_token: Optional[str]) -> dict:
+        """
+        發送一則訊息並回傳結果，寫回時再由 _result_params 以資料庫時間換算重試時間
+        """
+        # 領取時已累加嘗試次數，worker 中斷後重新領取也會計入
+        attempts = row.attempts
+        params = {
+            "b_id": row.id,
+            "b_token": row.claim_token,
+            "b_status": OutboxStatus.SENT,
+            "b_last_error": None,
+            "retry_delay": 0.0,
+        }
+
+        try:
+            if not channel_token:
+                raise LineApiError(401, "帳號未設定 channel_token")
+            await send_line_message(channel_token, row.kind, row.payload, row.retry_key)
+        except LineApiError as e:
+            # 409：相同 retry key 的請求先前已被接受（例如送出後在寫回結果前中斷）
+            if e.status_code != 409:
+                params["b_last_error"] = f"{e.status_code}: {e}"[:500]
+                # reply 沒有 retry key：逾時、5xx 時可能已送達，只有 429 確定未被處理可以重試
+                retryable = e.retryable and (row.kind != OutboxKind.REPLY or e.status_code == 429)
+                if retryable and attempts < settings.OUTBOX_MAX_ATTEMPTS:
+                    params["b_status"] = OutboxStatus.PENDING
+                    params["retry_delay"] = backoff_delay(attempts)
+                    self.retried += 1
+                else:
+                    params["b_status"] = OutboxStatus.FAILED
+                    self.failed += 1
+                return params
+
+        self.sent += 1
+        return params
+
+    async def process_batch(self) -> int:
+        """
+        領取並發送一批訊息
+
+        Returns:
+            int: 本批處理的訊息數
+        """
+        claimed = await self._claim()
+        if not claimed:
+            return 0
+
+        results = await asyncio.gather(*(self._deliver(row, token) for row, token in claimed))
+
+        async with SessionLocal() as session:
+            now = await db_now(session)
+            await session.execute(_apply_result_stmt, [_result_params(result, now) for result in results])
+            await session.commit()
+
+        return len(claimed)
+
+    async def _run_worker(self):
+        while True:
+            try:
+                processed = await self.process_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"LINE 發送佇列處理失敗: {e}")
+                processed = 0
+
+            if processed < self.batch_size:
+                # 佇列已清空，等待新訊息或下一次輪詢（也處理到期的重試）
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run_worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        停止 worker；發送中的訊息在租約到期後會被重新領取（reply 標記為 failed）
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+line_outbox = LineOutboxDispatcher(
+    workers=settings.OUTBOX_WORKERS,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_INTERVAL,
+)
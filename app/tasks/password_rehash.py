@@ -0,0 +1,35 @@
+import asyncio
+import logging
+from sqlalchemy import update
+from app.database import SessionLocal
+from app.models.account import Account
+from app.utils.password import hash_password_async
+
+logger = logging.getLogger(__name__)
+
+# 保留執行中的 task，避免被回收
+_pending: set[asyncio.Task] = set()
+
+
+async def _rehash(account_id: int, plain_password: str, old_hash: str):
+    try:
+        new_hash = await hash_password_async(plain_password)
+        # 只在密碼未被其他請求修改時才寫回
+        async with SessionLocal() as session:
+            await session.execute(
+                update(Account)
+                .where((Account.id == account_id) & (Account.password == old_hash))
+                .values(password=new_hash)
+            )
+            await session.commit()
+    except Exception:
+        logger.exception(f"帳號 {account_id} 密碼重新雜湊失敗")
+
+
+def schedule_rehash(account_id: int, plain_password: str, old_hash: str):
+    """
+    登入成功後在背景以目前的成本重新雜湊密碼並寫回，不影響登入回應時間
+    """
+    task = asyncio.create_task(_rehash(account_id, plain_password, old_hash))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import update, bindparam, case, func, or_, and_
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.account import Account
+from app.models.user import User
+from app.utils.line_profile import get_line_profile
+
+logger = logging.getLogger(__name__)
+
+# 保留執行中的 task，避免被回收
+_pending: set[asyncio.Task] = set()
+
+_user_table = User.__table__
+
+# 以主鍵逐筆套用個人資料的 executemany 語句
+# - 綁定姓名只在空白時填入，不覆蓋手動填寫的值
+# - 查無個人資料時保留原本的大頭貼，只更新同步時間
+# - 只有姓名或大頭貼實際變更時才更新 modified_at，讓增量同步取得變更；
+#   未變更時保持原值（onupdate 會讓每次同步都變更 modified_at，使增量同步重新下載所有使用者）
+_profile_changed = or_(
+    and_(bindparam("b_picture_url").isnot(None),
+         _user_table.c.picture_url.is_distinct_from(bindparam("b_picture_url"))),
+    and_(_user_table.c.user_name.is_(None), bindparam("b_user_name").isnot(None)),
+)
+_apply_profile_stmt = (
+    update(_user_table)
+    .where(_user_table.c.id == bindparam("b_id"))
+    .values(
+        user_name=func.coalesce(_user_table.c.user_name, bindparam("b_user_name")),
+        picture_url=func.coalesce(bindparam("b_picture_url"), _user_table.c.picture_url),
+        profile_synced_at=bindparam("b_synced_at"),
+        modified_at=case((_profile_changed, func.now()), else_=_user_table.c.modified_at),
+    )
+)
+
+
+def _profile_params(user_id: int, profile, synced_at: datetime) -> dict:
+    display_name = profile.display_name if profile else None
+    return {
+        "b_id": user_id,
+        "b_user_name": display_name[:30] if display_name else None,
+        "b_picture_url": profile.picture_url if profile else None,
+        "b_synced_at": synced_at,
+    }
+
+
+async def enrich_users(rows: list) -> tuple[int, int]:
+    """
+    並發取得一批使用者的 LINE 個人資料並以一次 executemany 寫回
+    - rows 需包含 id、account_id、line_user_id、channel_token
+    - 同時請求數由 line_client 限制
+
+    Returns:
+        tuple[int, int]: (已更新筆數, 失敗筆數)
+    """
+    results = await asyncio.gather(
+        *(get_line_profile(row.account_id, row.line_user_id, row.channel_token) for row in rows),
+        return_exceptions=True,
+    )
+
+    now = datetime.now()
+    params = []
+    failed = 0
+    for row, profile in zip(rows, results):
+        if isinstance(profile, Exception):
+            failed += 1
+            continue
+        params.append(_profile_params(row.id, profile, now))
+
+    if params:
+        async with SessionLocal() as session:
+            await session.execute(_apply_profile_stmt, params)
+            await session.commit()
+
+    return len(params), failed
+
+
+async def backfill_profiles(batch_size: Optional[int] = None, batch_sleep: Optional[float] = None,
+                            account_id: Optional[int] = None) -> tuple[int, int]:
+    """
+    分批回補尚未同步，或超過 LINE_PROFILE_REFRESH_DAYS 天未同步的使用者個人資料
+    - 以使用者 ID keyset 分批，失敗的使用者留待下次排程
+    - 只處理啟用中且已設定 channel_token 的帳號，指定 account_id 時只處理該帳號
+
+    Returns:
+        tuple[int, int]: (已更新筆數, 失敗筆數)
+    """
+    batch_size = batch_size or settings.LINE_PROFILE_BACKFILL_BATCH_SIZE
+    batch_sleep = settings.LINE_PROFILE_BACKFILL_BATCH_SLEEP if batch_sleep is None else batch_sleep
+    refresh_before = datetime.now() - timedelta(days=settings.LINE_PROFILE_REFRESH_DAYS)
+    last_user_id = 0
+    total = failed = 0
+
+    conditions = [
+        Account.status.is_(True),
+        Account.channel_token.isnot(None),
+        or_(User.profile_synced_at.is_(None), User.profile_synced_at < refresh_before),
+    ]
+    if account_id is not None:
+        conditions.append(User.account_id == account_id)
+
+    while True:
+        query = (
+            select(User.id, User.account_id, User.line_user_id, Account.channel_token)
+            .join(Account, Account.id == User.account_id)
+            .filter(User.id > last_user_id, *conditions)
+            .order_by(User.id)
+            .limit(batch_size)
+        )
+        async with SessionLocal() as session:
+            result = await session.execute(query)
+            rows = result.all()
+
+        if not rows:
+            break
+
+        updated, batch_failed = await enrich_users(rows)
+        total += updated
+        failed += batch_failed
+        last_user_id = rows[-1].id
+
+        if len(rows) < batch_size:
+            break
+
+        await asyncio.sleep(batch_sleep)
+
+    return total, failed
+
+
+async def run_profile_backfill_job():
+    """
+    背景排程：每隔 LINE_PROFILE_BACKFILL_INTERVAL 秒回補一次 LINE 個人資料
+    """
+    while True:
+        try:
+            updated, failed = await backfill_profiles()
+            if updated or failed:
+                logger.info(f"已同步 {updated} 位使用者的 LINE 個人資料，失敗 {failed} 位")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"LINE 個人資料回補排程執行失敗: {e}")
+
+        await asyncio.sleep(settings.LINE_PROFILE_BACKFILL_INTERVAL)
+
+
+async def _enrich_user(user_id: int):
+    try:
+        query = (
+            select(User.id, User.account_id, User.line_user_id, Account.channel_token)
+            .join(Account, Account.id == User.account_id)
+            .filter(User.id == user_id, Account.channel_token.isnot(None))
+        )
+        async with SessionLocal() as session:
+            result = await session.execute(query)
+            row = result.first()
+
+        if row:
+            await enrich_users([row])
+    except Exception:
+        logger.exception(f"使用者 {user_id} 同步 LINE 個人資料失敗")
+
+
+def schedule_profile_enrichment(user_id: int):
+    """
+    綁定成功後在背景同步 LINE 個人資料，不影響綁定回應時間
+    """
+    task = asyncio.create_task(_enrich_user(user_id))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
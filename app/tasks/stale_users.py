@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from typing import Optional
+from datetime import datetime, timedelta
+from sqlalchemy import update, delete, func
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal, db_now
+from app.models.user import User, UserStatus
+from app.models.user_tombstone import UserTombstone
+
+logger = logging.getLogger(__name__)
+
+
+def _in_job_window(now: datetime, hours: str) -> bool:
+    """
+    判斷目前時間是否在允許執行的時段內，支援跨午夜（例如 "22-6"）
+    """
+    if not hours:
+        return True
+
+    start, end = (int(h) for h in hours.split("-"))
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def stale_user_conditions(now: datetime) -> list:
+    """
+    失效規則，符合任一條件的使用者會被轉為 INACTIVE
+    - 建立後超過 STALE_USER_UNBOUND_DAYS 天仍未綁定
+    """
+    unbound_before = now - timedelta(days=settings.STALE_USER_UNBOUND_DAYS)
+    return [
+        (User.status == UserStatus.UNBOUND) & (User.created_at < unbound_before),
+    ]
+
+
+async def deactivate_stale_users(batch_size: Optional[int] = None, batch_sleep: Optional[float] = None) -> int:
+    """
+    分批將符合失效規則的使用者轉為 INACTIVE
+    - 每批一個短交易，只鎖定該批資料列（SKIP LOCKED 避開正在被修改的資料）
+    - 批次之間暫停，避免持續佔用資料庫
+
+    Returns:
+        int: 本次轉為 INACTIVE 的使用者數量
+    """
+    batch_size = batch_size or settings.STALE_USER_BATCH_SIZE
+    batch_sleep = settings.STALE_USER_BATCH_SLEEP if batch_sleep is None else batch_sleep
+    total = 0
+
+    # created_at 由 DEFAULT now() 寫入，期限以資料庫時鐘計算
+    async with SessionLocal() as session:
+        now = await db_now(session)
+
+    for condition in stale_user_conditions(now):
+        while True:
+            batch_ids = (
+                select(User.id)
+                .filter(condition)
+                .order_by(User.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            stmt = (
+                update(User)
+                .where(User.id.in_(batch_ids))
+                .values(status=UserStatus.INACTIVE, modified_by="system", modified_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+
+            async with SessionLocal() as session:
+                result = await session.execute(stmt)
+                await session.commit()
+
+            total += result.rowcount
+            if result.rowcount < batch_size:
+                break
+
+            await asyncio.sleep(batch_sleep)
+
+    return total
+
+
+async def prune_user_tombstones(batch_size: Optional[int] = None, batch_sleep: Optional[float] = None) -> int:
+    """
+    分批刪除超過 USER_TOMBSTONE_RETENTION_DAYS 天的使用者刪除紀錄
+    - 增量同步的游標早於保留期限時會要求用戶端重新全量同步，不會漏掉已清除的刪除紀錄
+
+    Returns:
+        int: 刪除的紀錄數量
+    """
+    batch_size = batch_size or settings.STALE_USER_BATCH_SIZE
+    batch_sleep = settings.STALE_USER_BATCH_SLEEP if batch_sleep is None else batch_sleep
+    total = 0
+
+    async with SessionLocal() as session:
+        cutoff = await db_now(session) - timedelta(days=settings.USER_TOMBSTONE_RETENTION_DAYS)
+
+    while True:
+        batch_ids = (
+            select(UserTombstone.id)
+            .filter(UserTombstone.deleted_at < cutoff)
+            .order_by(UserTombstone.id)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        stmt = delete(UserTombstone).where(UserTombstone.id.in_(batch_ids)).execution_options(
+            synchronize_session=False)
+
+        async with SessionLocal() as session:
+            result = await session.execute(stmt)
+            await session.commit()
+
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            break
+
+        await asyncio.sleep(batch_sleep)
+
+    return total
+
+
+async def run_stale_user_job():
+    """
+    背景排程：每隔 STALE_USER_JOB_INTERVAL 秒，在允許的時段內執行一次失效處理，並清除過期的使用者刪除紀錄
+    """
+    while True:
+        if _in_job_window(datetime.now(), settings.STALE_USER_JOB_HOURS):
+            try:
+                count = await deactivate_stale_users()
+                if count:
+                    logger.info(f"已將 {count} 位逾期未綁定的使用者設為失效")
+                count = await prune_user_tombstones()
+                if count:
+                    logger.info(f"已清除 {count} 筆過期的使用者刪除紀錄")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"失效使用者排程執行失敗: {e}")
+
+        await asyncio.sleep(settings.STALE_USER_JOB_INTERVAL)
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.account import Account, RoleType
+from app.utils.invalidation import invalidation_bus
+from app.utils.singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+# 增量更新往回多讀的時間：updated_at 是交易開始時間，較晚提交的交易可能早於水位
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+
+@dataclass(frozen=True)
+class AccountState:
+    """
+    驗證 Token 需要的帳號狀態
+    """
+    status: bool
+    role: RoleType
+
+
+# 已刪除（或不存在）的帳號
+_DELETED = AccountState(status=False, role=RoleType.USER)
+
+
+@single_flight("account_state")
+async def _load_account_state(account_id: int) -> AccountState:
+    query = select(Account.status, Account.role).filter(Account.id == account_id)
+    async with SessionLocal() as session:
+        result = await session.execute(query)
+        row = result.first()
+
+    if row is None:
+        return _DELETED
+    return AccountState(status=row.status, role=row.role)
+
+
+class AccountStateCache:
+    """
+    所有帳號的 (status, role) 記憶體快照，驗證 Token 時只查 dict，不查資料庫
+    - 每 ACCOUNT_STATE_REFRESH_INTERVAL 秒只查詢 updated_at 不早於水位的帳號，增量更新
+    - 帳號刪除無法從 updated_at 得知，由帳號路由透過 invalidation_bus 通知，
+      另每 ACCOUNT_STATE_FULL_REFRESH_INTERVAL 秒全量重建
+    - 未命中（新帳號、剛失效）時單獨查詢該帳號，相同帳號的並發查詢共用一次
+    - 查詢期間收到失效通知的帳號不寫入查詢結果（可能是提交前的舊資料），其餘帳號照常更新
+    """
+
+    def __init__(self, refresh_interval: float, full_refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.hits = 0
+        self.misses = 0
+        self._states: dict[int, AccountState] = {}
+        self._watermark: Optional[datetime] = None
+        self._generation = 0  # clear() 時遞增，查詢期間整個快取被清空則捨棄結果
+        self._tracking: list[set[int]] = []  # 進行中的查詢各自記錄期間失效的帳號
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self, account_id: int) -> AccountState:
+        state = self._states.get(account_id)
+        if state is not None:
+            self.hits += 1
+            return state
+
+        self.misses += 1
+        generation = self._generation
+        with self._track_invalidations() as invalidated:
+            state = await _load_account_state(account_id)
+        # 查詢期間收到失效通知時不寫入，避免放回舊的狀態
+        if generation == self._generation and account_id not in invalidated:
+            self._states[account_id] = state
+        return state
+
+    @contextmanager
+    def _track_invalidations(self):
+        invalidated: set[int] = set()
+        self._tracking.append(invalidated)
+        try:
+            yield invalidated
+        finally:
+            self._tracking.remove(invalidated)
+
+    def invalidate(self, account_id: int):
+        self._states.pop(account_id, None)
+        for invalidated in self._tracking:
+            invalidated.add(account_id)
+
+    def clear(self):
+        self._generation += 1
+        self._states.clear()
+        self._watermark = None
+
+    async def refresh(self, full: bool = False):
+        generation = self._generation
+        query = select(Account.id, Account.status, Account.role, Account.updated_at)
+        if not full and self._watermark is not None:
+            query = query.filter(Account.updated_at >= self._watermark - WATERMARK_OVERLAP)
+
+        with self._track_invalidations() as invalidated:
+            async with SessionLocal() as session:
+                result = await session.execute(query)
+                rows = result.all()
+
+        # 查詢期間整個快取被清空，結果可能是提交前的舊資料，留待下次更新
+        if generation != self._generation:
+            return
+
+        # 查詢期間失效的帳號略過，下次使用時單獨查詢
+        states = {row.id: AccountState(status=row.status, role=row.role)
+                  for row in rows if row.id not in invalidated}
+        if full:
+            self._states = states
+        else:
+            self._states.update(states)
+
+        updated = [row.updated_at for row in rows if row.updated_at is not None]
+        if updated:
+            self._watermark = max(updated + ([self._watermark] if self._watermark else []))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_full_refresh = loop.time()
+
+        while True:
+            full = loop.time() >= next_full_refresh
+            try:
+                await self.refresh(full=full)
+                if full:
+                    next_full_refresh = loop.time() + self.full_refresh_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"帳號狀態快取更新失敗: {e}")
+
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "accounts": len(self._states),
+            "hits": self.hits,
+            "misses": self.misses,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+        }
+
+
+account_states = AccountStateCache(
+    refresh_interval=settings.ACCOUNT_STATE_REFRESH_INTERVAL,
+    full_refresh_interval=settings.ACCOUNT_STATE_FULL_REFRESH_INTERVAL,
+)
+
+invalidation_bus.register(
+    "account_state", account_states.invalidate, clear=account_states.clear)
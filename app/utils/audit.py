@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+from app.config import settings
+from app.database import SessionLocal
+from app.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# 不寫入稽核紀錄的敏感欄位，只保留遮罩
+REDACTED_FIELDS = {"password", "channel_token", "channel_secret", "bind_word", "verify_code"}
+REDACTED = "***"
+
+
+def redact(value: Any) -> Any:
+    """
+    遮罩敏感欄位（遞迴處理巢狀的 dict / list）
+    """
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in REDACTED_FIELDS and item is not None else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+class AuditLogger:
+    """
+    非同步批次寫入的稽核紀錄
+    - record() 只把紀錄放進記憶體佇列，不等待資料庫
+    - 背景工作每 flush_interval 秒或累積 batch_size 筆時，以一次多列 INSERT 寫入 audit_log
+    - 佇列有上限，滿了就丟棄並計數，避免資料庫異常時記憶體無限成長
+    """
+
+    def __init__(self, queue_size: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        request: Request,
+        token_data: Optional[dict],
+        action: str,
+        resource_type: str,
+        resource_id: Optional[int] = None,
+        before: Any = None,
+        after: Any = None,
+    ):
+        """
+        新增一筆稽核紀錄（不阻塞）
+        - before / after 中的敏感欄位（REDACTED_FIELDS）以遮罩取代
+        """
+        token_data = token_data or {}
+        entry = {
+            "actor_account_id": token_data.get("account_id"),
+            "actor": token_data.get("sub"),
+            "actor_ip": request.client.host if request.client else None,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "before": redact(jsonable_encoder(before)) if before is not None else None,
+            "after": redact(jsonable_encoder(after)) if after is not None else None,
+            "created_at": datetime.now(),
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _write(self, batch: list):
+        try:
+            async with SessionLocal() as session:
+                await session.execute(insert(AuditLog), batch)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"稽核紀錄寫入失敗，遺失 {len(batch)} 筆: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                return
+
+            batch = [entry]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            await self._write(batch)
+            if stopping:
+                return
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        關閉時寫入佇列中剩餘的紀錄
+        """
+        if self._task is None:
+            return
+
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+        # _STOP 之後才進入佇列的紀錄
+        remaining = []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        for start in range(0, len(remaining), self.batch_size):
+            await self._write(remaining[start:start + self.batch_size])
+
+
+audit_logger = AuditLogger(
+    queue_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+)
@@ -0,0 +1,63 @@
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.config import settings
+from app.models.account import Account, BindType
+from app.utils.cache import TTLCache
+from app.utils.invalidation import invalidation_bus
+
+
+@dataclass(frozen=True)
+class BindSettings:
+    """
+    帳號的綁定設定（僅保留綁定流程需要的欄位）
+    """
+    account_id: int
+    bind_type: Optional[BindType]
+    bind_word: Optional[str]
+    status: bool
+
+
+_bind_settings_cache = TTLCache(
+    maxsize=settings.BIND_SETTINGS_CACHE_SIZE,
+    ttl=settings.BIND_SETTINGS_CACHE_TTL,
+)
+
+
+async def get_bind_settings(db: AsyncSession, account_id: int) -> Optional[BindSettings]:
+    """
+    取得帳號綁定設定，優先從快取讀取，快取未命中才查詢資料庫
+    - 帳號不存在時回傳 None（不快取，避免新帳號建立後仍查不到）
+    """
+    bind_settings = _bind_settings_cache.get(account_id)
+    if bind_settings is not None:
+        return bind_settings
+
+    query = select(Account.id, Account.bind_type, Account.bind_word, Account.status).filter(
+        Account.id == account_id)
+    result = await db.execute(query)
+    row = result.first()
+
+    if row is None:
+        return None
+
+    bind_settings = BindSettings(
+        account_id=row.id,
+        bind_type=row.bind_type,
+        bind_word=row.bind_word,
+        status=row.status,
+    )
+    _bind_settings_cache.set(account_id, bind_settings)
+    return bind_settings
+
+
+def invalidate_bind_settings(account_id: int):
+    """
+    清除本程序的綁定設定快取；帳號變更時請改用 invalidation_bus.publish 通知所有 worker
+    """
+    _bind_settings_cache.pop(account_id)
+
+
+invalidation_bus.register(
+    "bind_settings", invalidate_bind_settings, clear=_bind_settings_cache.clear)
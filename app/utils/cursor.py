@@ -0,0 +1,31 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+
+def encode_cursor(positions: dict) -> str:
+    """
+    將各資料流的位置 {名稱: (時間, id)} 編碼成不透明的游標字串
+    """
+    payload = {
+        name: [position[0].isoformat(), position[1]] if position else None
+        for name, position in positions.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[dict]:
+    """
+    解碼游標字串，格式錯誤時回傳 None
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return {
+            name: (datetime.fromisoformat(position[0]), int(position[1])) if position else None
+            for name, position in payload.items()
+        }
+    except (ValueError, TypeError, IndexError, AttributeError):
+        return None
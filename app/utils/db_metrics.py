@@ -0,0 +1,74 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# 目前請求的資料庫耗時（秒），由 AccessLogMiddleware 在請求開始時建立
+_request_timing: ContextVar[Optional[dict]] = ContextVar(
+    "db_request_timing", default=None)
+
+# 各路由累計的連線佔用與查詢耗時
+_route_stats: dict[str, dict] = {}
+
+
+def start_request_timing() -> dict:
+    timing = {"hold": 0.0, "query": 0.0, "checkouts": 0}
+    _request_timing.set(timing)
+    return timing
+
+
+def record_route_timing(route: str, timing: dict):
+    stats = _route_stats.setdefault(
+        route, {"requests": 0, "hold": 0.0, "query": 0.0, "max_hold": 0.0})
+    stats["requests"] += 1
+    stats["hold"] += timing["hold"]
+    stats["query"] += timing["query"]
+    stats["max_hold"] = max(stats["max_hold"], timing["hold"])
+
+
+def route_timing_stats() -> dict:
+    """
+    各路由平均每個請求的連線佔用時間與實際查詢時間（毫秒）
+    - hold 遠大於 query 表示連線在等待非資料庫的工作（如 bcrypt）
+    """
+    return {
+        route: {
+            "requests": stats["requests"],
+            "avg_hold_ms": round(stats["hold"] / stats["requests"] * 1000, 2),
+            "avg_query_ms": round(stats["query"] / stats["requests"] * 1000, 2),
+            "max_hold_ms": round(stats["max_hold"] * 1000, 2),
+        }
+        for route, stats in _route_stats.items()
+    }
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    掛上連線池與查詢事件，統計每個請求的連線佔用時間（checkout 到 checkin）與查詢時間
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checkout_at"] = time.perf_counter()
+        connection_record.info["timing"] = _request_timing.get()
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checkout_at = connection_record.info.pop("checkout_at", None)
+        timing = connection_record.info.pop("timing", None)
+        if checkout_at is not None and timing is not None:
+            timing["hold"] += time.perf_counter() - checkout_at
+            timing["checkouts"] += 1
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def on_before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def on_after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        timing = _request_timing.get()
+        if timing is not None:
+            timing["query"] += time.perf_counter() - started
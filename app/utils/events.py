@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Optional
+from app.config import settings
+
+# 訂閱所有帳號事件（管理員）時使用的主題
+ALL_ACCOUNTS = "*"
+
+
+class Subscription:
+    """
+    單一訂閱者，擁有自己的有界佇列
+    - 佇列滿時依 policy 處理：drop_oldest 丟棄最舊的事件，disconnect 直接中斷該訂閱者
+    """
+
+    def __init__(self, broker: "EventBroker", topic, maxsize: int, policy: str):
+        self.broker = broker
+        self.topic = topic
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, event: dict):
+        if self.closed:
+            return
+
+        if self._queue.full():
+            if self.policy == "disconnect":
+                self.closed = True
+                self.broker.disconnected += 1
+                return
+            self._queue.get_nowait()
+            self.dropped += 1
+            self.broker.dropped += 1
+
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """
+        取得下一個事件，逾時回傳 None
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.closed = True
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """
+    程序內的發布/訂閱，依帳號分主題扇出事件
+    - publish 不等待任何訂閱者，慢的訂閱者不會拖慢請求
+    """
+
+    def __init__(self, buffer_size: int, policy: str):
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self.published = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self._subscribers: dict[Any, set[Subscription]] = {}
+
+    def subscribe(self, topic) -> Subscription:
+        subscription = Subscription(
+            self, topic, self.buffer_size, self.policy)
+        self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.topic)
+        if subscribers:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.topic]
+
+    def publish(self, topic, event: dict):
+        self.published += 1
+        for subscription in list(self._subscribers.get(topic, ())):
+            subscription.offer(event)
+        if topic != ALL_ACCOUNTS:
+            for subscription in list(self._subscribers.get(ALL_ACCOUNTS, ())):
+                subscription.offer(event)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": sum(len(subs) for subs in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+        }
+
+
+user_events = EventBroker(
+    buffer_size=settings.EVENT_SUBSCRIBER_BUFFER,
+    policy=settings.EVENT_SLOW_CONSUMER_POLICY,
+)
+
+
+def publish_user_event(event_type: str, account_id: int, data: Any):
+    """
+    發布使用者異動事件 (user.created / user.updated / user.deleted / user.bound)
+    - data 應為已可 JSON 序列化的資料
+    """
+    user_events.publish(account_id, {
+        "type": event_type,
+        "account_id": account_id,
+        "data": data,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    })
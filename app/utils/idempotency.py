@@ -0,0 +1,119 @@
+import asyncio
+import functools
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import Request, Response
+from pydantic import BaseModel
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.response import fail_response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+@dataclass
+class IdempotencyEntry:
+    """
+    同一個 Idempotency-Key 的第一次執行結果
+    - future 完成前代表仍在執行中，重複的請求會等待同一個結果
+    """
+    fingerprint: str
+    future: asyncio.Future
+    status_code: Optional[int] = None
+    body: Optional[bytes] = None
+    media_type: Optional[str] = None
+
+
+_idempotency_store = TTLCache(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl=settings.IDEMPOTENCY_TTL,
+)
+
+
+def _fingerprint(kwargs: dict) -> str:
+    """
+    以請求內容 (pydantic 模型) 計算指紋，用來偵測同一個 key 被用於不同內容
+    """
+    digest = hashlib.sha256()
+    for name in sorted(kwargs):
+        value = kwargs[name]
+        if isinstance(value, BaseModel):
+            digest.update(name.encode("utf-8"))
+            digest.update(value.model_dump_json().encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _replay(entry: IdempotencyEntry) -> Response:
+    return Response(
+        content=entry.body,
+        status_code=entry.status_code,
+        media_type=entry.media_type,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _retrieve_exception(future: asyncio.Future):
+    # 沒有等待者時避免 "exception was never retrieved" 警告
+    if not future.cancelled():
+        future.exception()
+
+
+def idempotent(handler):
+    """
+    為 POST 路由加上 Idempotency-Key 支援
+    - 以 (token sub, method, path, key) 保存第一次的回應（狀態碼 + 內容），重試時直接回放，不再執行 handler
+    - 同一個 key 的並發請求共用同一次執行
+    - 路由需宣告 `request: Request` 與 `token_data` 參數
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        request: Request = kwargs["request"]
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return await handler(*args, **kwargs)
+
+        if len(key) > 255:
+            return fail_response(message="Idempotency-Key too long", status_code=400)
+
+        token_data = kwargs.get("token_data") or {}
+        cache_key = (token_data.get("sub"), request.method,
+                     request.url.path, key)
+        fingerprint = _fingerprint(kwargs)
+
+        entry = _idempotency_store.get(cache_key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                return fail_response(message="Idempotency-Key 已用於不同的請求內容", status_code=422)
+
+            # 第一次執行尚未完成時等待其結果；shield 避免等待者取消時連帶取消共用的 future
+            await asyncio.shield(entry.future)
+            return _replay(entry)
+
+        entry = IdempotencyEntry(
+            fingerprint=fingerprint,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        entry.future.add_done_callback(_retrieve_exception)
+        _idempotency_store.set(cache_key, entry)
+
+        try:
+            response = await handler(*args, **kwargs)
+        except asyncio.CancelledError:
+            _idempotency_store.pop(cache_key)
+            entry.future.cancel()
+            raise
+        except Exception as e:
+            # 執行失敗不保存結果，之後的重試會重新執行
+            _idempotency_store.pop(cache_key)
+            entry.future.set_exception(e)
+            raise
+
+        entry.status_code = response.status_code
+        entry.body = bytes(response.body)
+        entry.media_type = response.media_type
+        entry.future.set_result(None)
+        return response
+
+    return wrapper
@@ -0,0 +1,17 @@
+from typing import Iterable, Optional
+
+
+def parse_include(include: Optional[str], allowed: Iterable[str]) -> Optional[set]:
+    """
+    解析 `include` 查詢參數（逗號分隔）
+
+    Returns:
+        set: 要附加的關聯資料名稱；包含不允許的名稱時回傳 None
+    """
+    if not include:
+        return set()
+
+    names = {name.strip() for name in include.split(",") if name.strip()}
+    if not names <= set(allowed):
+        return None
+    return names
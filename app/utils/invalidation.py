@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Callable, Hashable, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidationBus:
+    """
+    跨 worker 的快取失效通知
+    - 各快取以名稱註冊失效函式；publish 時先在本程序失效，再透過 backend 通知其他 worker
+    - local：僅本程序（單一 worker 或測試）
+    - postgres：使用既有 PostgreSQL 的 LISTEN/NOTIFY，所有 worker / 節點都會收到
+    """
+
+    def __init__(self, backend: str, channel: str):
+        self.backend = backend
+        self.channel = channel
+        self.origin = uuid.uuid4().hex  # 用來忽略自己發出的通知
+        self._handlers: dict[str, Callable[[Hashable], None]] = {}
+        self._clear_handlers: dict[str, Callable[[], None]] = {}
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+        # 傳遞延遲統計（秒），以發送端與接收端的時鐘計算
+        self.received = 0
+        self.delay_total = 0.0
+        self.delay_max = 0.0
+
+    def register(self, name: str, handler: Callable[[Hashable], None], clear: Callable[[], None]):
+        """
+        註冊快取的失效函式，clear 用於與其他 worker 失去聯繫時清空整個快取
+        """
+        self._handlers[name] = handler
+        self._clear_handlers[name] = clear
+
+    def _apply(self, name: str, key):
+        handler = self._handlers.get(name)
+        if handler:
+            handler(key)
+
+    def _clear_all(self):
+        for clear in self._clear_handlers.values():
+            clear()
+
+    async def publish(self, name: str, key):
+        """
+        使快取項目失效並通知其他 worker，應在資料庫交易提交後呼叫
+        """
+        self._apply(name, key)
+
+        if self.backend != "postgres" or self._connection is None:
+            return
+
+        payload = json.dumps({
+            "origin": self.origin,
+            "cache": name,
+            "key": key,
+            "sent_at": time.time(),
+        })
+        try:
+            async with self._lock:
+                await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception as e:
+            logger.warning(f"快取失效通知發送失敗: {e}")
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get("origin") == self.origin:
+            return
+
+        delay = max(time.time() - message.get("sent_at", time.time()), 0.0)
+        self.received += 1
+        self.delay_total += delay
+        self.delay_max = max(self.delay_max, delay)
+
+        self._apply(message.get("cache"), message.get("key"))
+
+    def _on_termination(self, connection):
+        # 連線中斷期間可能漏掉通知，清空快取後重新連線
+        self._connection = None
+        self._clear_all()
+        if not self._closing:
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _connect(self):
+        import asyncpg
+        from app.database import engine
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False)
+        connection = await asyncpg.connect(dsn)
+        await connection.add_listener(self.channel, self._on_notification)
+        connection.add_termination_listener(self._on_termination)
+        self._connection = connection
+
+    async def _reconnect(self):
+        delay = 1.0
+        while not self._closing:
+            try:
+                await self._connect()
+                return
+            except Exception as e:
+                logger.warning(f"快取失效通知重新連線失敗，{delay:.0f} 秒後重試: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def start(self):
+        if self.backend == "postgres":
+            self._closing = False
+            await self._connect()
+
+    async def stop(self):
+        self._closing = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            await connection.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "connected": self._connection is not None if self.backend == "postgres" else True,
+            "received": self.received,
+            "delay_avg_ms": self.delay_total / self.received * 1000 if self.received else None,
+            "delay_max_ms": self.delay_max * 1000 if self.received else None,
+        }
+
+
+invalidation_bus = InvalidationBus(
+    backend=settings.INVALIDATION_BACKEND,
+    channel=settings.INVALIDATION_CHANNEL,
+)
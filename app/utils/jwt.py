@@ -4,7 +4,8 @@ from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 from app.config import settings
 from fastapi.security import OAuth2PasswordBearer
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
+from app.utils.account_state import account_states
 
 # 設定 JWT 加密金鑰和過期時間
 SECRET_KEY = settings.JWT_SECRET_KEY
@@ -33,20 +34,32 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
 
 # 驗證 Token 的函式
-def verify_jwt_token(token: str = Depends(oauth2_scheme)):
+async def verify_jwt_token(token: str = Depends(oauth2_scheme), request: Request = None):
     """
     驗證 JWT Token 並返回解碼後的 payload
+    - 帳號已停用、已刪除或角色已變更時拒絕（帳號狀態來自記憶體快取，不查資料庫）
+    - 作為依賴時會將 account_id 記錄在 request.state，供存取日誌使用
     """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        account_id = payload.get("account_id")
-        role = payload.get("role")
-
-        if account_id is None or role is None:
-            raise HTTPException(status_code=401, detail="Token 無效")
-
-        return payload  # 回傳完整的 payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token 已過期")
     except jwt.JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+    account_id = payload.get("account_id")
+    role = payload.get("role")
+
+    if account_id is None or role is None:
+        raise HTTPException(status_code=401, detail="Token 無效")
+
+    state = await account_states.get(account_id)
+    if not state.status:
+        raise HTTPException(status_code=401, detail="帳號已停用或不存在")
+    if state.role.value != role:
+        raise HTTPException(status_code=401, detail="帳號權限已變更，請重新登入")
+
+    if request is not None:
+        request.state.account_id = account_id
+
+    return payload  # 回傳完整的 payload
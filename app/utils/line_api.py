@@ -0,0 +1,88 @@
+import asyncio
+from typing import Optional
+import httpx
+from app.config import settings
+
+
+class LineApiError(Exception):
+    """
+    LINE Messaging API 回應錯誤
+    - retryable 為 True 表示可稍後重試（429、5xx、連線錯誤）
+    """
+
+    def __init__(self, status_code: Optional[int], message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = status_code is None or status_code == 429 or status_code >= 500
+
+
+class LineClient:
+    """
+    LINE Messaging API 客戶端
+    - 共用同一個 httpx.AsyncClient（連線池），並以 semaphore 限制同時請求數
+    - base_url 可指向本地替身伺服器進行測試
+    """
+
+    def __init__(self, base_url: str, timeout: float, max_connections: int):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_connections)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, channel_token: str, json: Optional[dict] = None,
+                       retry_key: Optional[str] = None) -> dict:
+        headers = {"Authorization": f"Bearer {channel_token}"}
+        if retry_key:
+            # 相同 retry key 的請求 LINE 只會處理一次，重試時不會重複發送
+            headers["X-Line-Retry-Key"] = retry_key
+        try:
+            async with self._semaphore:
+                response = await self.client.request(method, path, headers=headers, json=json)
+        except httpx.HTTPError as e:
+            raise LineApiError(None, f"{type(e).__name__}: {e}") from e
+
+        if response.status_code >= 400:
+            raise LineApiError(response.status_code, response.text[:500])
+        return response.json() if response.content else {}
+
+    async def push(self, channel_token: str, to: str, messages: list, retry_key: Optional[str] = None) -> dict:
+        return await self._request("POST", "/v2/bot/message/push", channel_token, {"to": to, "messages": messages},
+                                   retry_key=retry_key)
+
+    async def multicast(self, channel_token: str, to: list, messages: list, retry_key: Optional[str] = None) -> dict:
+        """
+        一次最多 500 位使用者
+        """
+        return await self._request("POST", "/v2/bot/message/multicast", channel_token, {"to": to, "messages": messages},
+                                   retry_key=retry_key)
+
+    async def reply(self, channel_token: str, reply_token: str, messages: list) -> dict:
+        return await self._request("POST", "/v2/bot/message/reply", channel_token,
+                                   {"replyToken": reply_token, "messages": messages})
+
+    async def get_profile(self, channel_token: str, line_user_id: str) -> dict:
+        return await self._request("GET", f"/v2/bot/profile/{line_user_id}", channel_token)
+
+
+line_client = LineClient(
+    base_url=settings.LINE_API_BASE_URL,
+    timeout=settings.LINE_API_TIMEOUT,
+    max_connections=settings.LINE_API_MAX_CONNECTIONS,
+)
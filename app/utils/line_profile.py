@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from typing import Optional
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.line_api import line_client, LineApiError
+from app.utils.singleflight import single_flight
+
+
+@dataclass(frozen=True)
+class LineProfile:
+    """
+    LINE 個人資料（僅保留需要的欄位）
+    """
+    line_user_id: str
+    display_name: Optional[str]
+    picture_url: Optional[str]
+
+
+_profile_cache = TTLCache(
+    maxsize=settings.LINE_PROFILE_CACHE_SIZE,
+    ttl=settings.LINE_PROFILE_CACHE_TTL,
+)
+
+_MISSING = object()
+
+
+@single_flight("line_profile")
+async def _fetch_line_profile(account_id: int, line_user_id: str, channel_token: str) -> Optional[LineProfile]:
+    """
+    呼叫 LINE profile API，相同使用者的並發查詢只送出一次請求
+    - 使用者已封鎖或非好友時 LINE 回傳 404，視為查無資料
+    """
+    try:
+        data = await line_client.get_profile(channel_token, line_user_id)
+    except LineApiError as e:
+        if e.status_code == 404:
+            return None
+        raise
+
+    return LineProfile(
+        line_user_id=line_user_id,
+        display_name=data.get("displayName"),
+        picture_url=data.get("pictureUrl"),
+    )
+
+
+async def get_line_profile(account_id: int, line_user_id: str, channel_token: str) -> Optional[LineProfile]:
+    """
+    取得 LINE 個人資料，優先從快取讀取
+    - 查無資料也會快取 LINE_PROFILE_NOT_FOUND_TTL 秒，避免重複查詢
+    - 其他錯誤（逾時、429、5xx）不快取，直接拋出 LineApiError
+    """
+    key = (account_id, line_user_id)
+    profile = _profile_cache.get(key, _MISSING)
+    if profile is not _MISSING:
+        return profile
+
+    profile = await _fetch_line_profile(account_id, line_user_id, channel_token)
+    _profile_cache.set(key, profile, ttl=None if profile else settings.LINE_PROFILE_NOT_FOUND_TTL)
+    return profile
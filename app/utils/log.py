@@ -0,0 +1,163 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from app.config import settings
+from app.utils.db_metrics import start_request_timing, record_route_timing
+
+access_logger = logging.getLogger("app.access")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    以單行 JSON 輸出日誌，`extra={"fields": {...}}` 的內容會併入輸出
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            data.update(fields)
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    佇列滿時直接丟棄並計數，不阻塞 event loop
+    """
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def setup_logging():
+    """
+    設定日誌：所有紀錄先放入有界佇列，由背景執行緒寫到 stdout
+    - 請求處理中寫日誌只做一次 put，不會因 stdout 緩慢而阻塞
+    - SQL 日誌等級由 SQL_LOG_LEVEL 控制 (off / info / debug)
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [DroppingQueueHandler(log_queue)]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    sql_levels = {"off": logging.WARNING,
+                  "info": logging.INFO, "debug": logging.DEBUG}
+    logging.getLogger("sqlalchemy.engine").setLevel(
+        sql_levels.get(settings.SQL_LOG_LEVEL.lower(), logging.WARNING))
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """
+    停止背景寫入執行緒，並寫出佇列中剩餘的紀錄
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _parse_sample_rates(value: str) -> dict:
+    """
+    解析 "路由:比例" 的逗號分隔設定，例如 "/api/users/:0.1,/api/protected/:0"
+    """
+    rates = {}
+    for item in value.split(","):
+        if ":" not in item:
+            continue
+        path, rate = item.rsplit(":", 1)
+        rates[path.strip()] = float(rate)
+    return rates
+
+
+class AccessLogMiddleware:
+    """
+    結構化存取日誌 (ASGI middleware)
+    - 紀錄 route、method、status、latency、account_id、request id
+    - 紀錄資料庫連線佔用時間 (db_hold_ms) 與查詢時間 (db_query_ms)，並累計到各路由統計
+    - 高流量路由可依 LOG_ACCESS_SAMPLE_RATES 抽樣，4xx/5xx 一律記錄
+    - 回應標頭附上 X-Request-ID
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sample_rates = _parse_sample_rates(
+            settings.LOG_ACCESS_SAMPLE_RATES)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] \
+            or uuid.uuid4().hex
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+
+        status_code = 500
+        started = time.perf_counter()
+        db_timing = start_request_timing()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(
+                    message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000
+            route = scope.get("route")
+            route_path = getattr(route, "path", scope.get("path"))
+            rate = self.sample_rates.get(route_path, 1.0)
+            record_route_timing(route_path, db_timing)
+
+            if status_code >= 400 or rate >= 1.0 or random.random() < rate:
+                access_logger.info("request", extra={"fields": {
+                    "request_id": request_id,
+                    "method": scope.get("method"),
+                    "route": route_path,
+                    "status": status_code,
+                    "latency_ms": round(latency_ms, 2),
+                    "db_hold_ms": round(db_timing["hold"] * 1000, 2),
+                    "db_query_ms": round(db_timing["query"] * 1000, 2),
+                    "account_id": state.get("account_id"),
+                    "client_ip": (scope.get("client") or (None,))[0],
+                    "sample_rate": rate,
+                }})
@@ -1,6 +1,17 @@
 import bcrypt
+import logging
 import re
+import time
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.config import settings
+from app.models.system_setting import SystemSetting
+
+logger = logging.getLogger(__name__)
 
 # 密碼驗證正則表達式
 PASSWORD_REGEX = r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)[A-Za-z\d@$!%*?&]{8,}$"
@@ -19,11 +30,70 @@ def validate_password(password: str):
         )
 
 
+class PasswordPolicy:
+    """
+    密碼雜湊的成本設定
+    - rounds 為 bcrypt 的 cost (log2 迭代次數)，會記錄在雜湊字串中 ($2b$<rounds>$...)
+    - 預設取自 PASSWORD_BCRYPT_ROUNDS；開啟自動校準時，由第一個啟動的 worker 量測後存入 system_setting，
+      其他 worker 與之後的啟動都讀取同一個值，不會各自量出不同的成本而互相重新雜湊
+    - 要重新校準時刪除該筆設定，或以 benchmarks.password_hash_benchmark --save 寫入新的值
+    """
+
+    SETTING_KEY = "password_bcrypt_rounds"
+
+    def __init__(self, rounds: int, min_rounds: int, max_rounds: int):
+        self.rounds = rounds
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+
+    def measure(self, target_ms: float) -> int:
+        """
+        量測最低成本的雜湊時間並推估（每加 1 輪時間加倍），回傳不超過目標時間的最高成本
+        """
+        password = b"calibration-password"
+        hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=self.min_rounds))
+        started = time.perf_counter()
+        bcrypt.checkpw(password, hashed)
+        base_ms = (time.perf_counter() - started) * 1000
+
+        rounds = self.min_rounds
+        while rounds < self.max_rounds and base_ms * 2 ** (rounds + 1 - self.min_rounds) <= target_ms:
+            rounds += 1
+        return rounds
+
+    async def calibrate(self, db: AsyncSession, target_ms: float) -> int:
+        """
+        讀取共用的校準結果，尚未校準時量測並寫入；多個 worker 同時寫入時以先寫入者為準
+        """
+        query = select(SystemSetting.value).filter(SystemSetting.key == self.SETTING_KEY)
+        stored = (await db.execute(query)).scalar_one_or_none()
+
+        if stored is None:
+            rounds = await run_in_threadpool(self.measure, target_ms)
+            try:
+                await db.execute(insert(SystemSetting).values(key=self.SETTING_KEY, value=str(rounds)))
+                await db.commit()
+                logger.info(f"密碼雜湊成本校準為 {rounds}（目標 {target_ms:.0f} ms）")
+            except IntegrityError:
+                await db.rollback()
+            stored = (await db.execute(query)).scalar_one()
+
+        self.rounds = int(stored)
+        return self.rounds
+
+
+password_policy = PasswordPolicy(
+    rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    min_rounds=settings.PASSWORD_BCRYPT_MIN_ROUNDS,
+    max_rounds=settings.PASSWORD_BCRYPT_MAX_ROUNDS,
+)
+
+
 def hash_password(password: str) -> str:
     """
-    使用 bcrypt 對密碼進行加密。
+    使用 bcrypt 對密碼進行加密，成本依 password_policy。
     """
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=password_policy.rounds)
     hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
     return hashed_password.decode("utf-8")
 
@@ -40,3 +110,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         bool: 如果密碼正確，返回 True；否則返回 False。
     """
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    在執行緒池中加密密碼，bcrypt 計算期間不阻塞 event loop。
+    """
+    return await run_in_threadpool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    在執行緒池中驗證密碼，bcrypt 計算期間不阻塞 event loop。
+    """
+    return await run_in_threadpool(verify_password, plain_password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    雜湊的成本與目前設定不同時回傳 True（格式：$2b$<rounds>$...）。
+    - 所有 worker 使用相同的成本（設定值或共用的校準結果），不會來回重新雜湊
+    """
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != password_policy.rounds
@@ -0,0 +1,124 @@
+import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import HTTPException
+from app.config import settings
+from app.utils.jwt import verify_jwt_token
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfileStore:
+    """
+    保存最近的 profile 結果（有上限，超過時淘汰最舊的）
+    - 只保存 pyinstrument 的 session，查詢時才輸出 HTML / speedscope
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+
+    def add(self, profile: dict):
+        self._profiles[profile["id"]] = profile
+        while len(self._profiles) > self.maxsize:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> list:
+        return [
+            {key: value for key, value in profile.items() if key != "session"}
+            for profile in reversed(self._profiles.values())
+        ]
+
+
+profile_store = ProfileStore(maxsize=settings.PROFILE_MAX_STORED)
+
+
+async def _is_admin_request(headers: dict) -> bool:
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        token_data = await verify_jwt_token(authorization[7:])
+    except HTTPException:
+        return False
+    return token_data.get("role") == "admin"
+
+
+def render_profile(profile: dict, output_format: str) -> str:
+    """
+    輸出 profile：html（火焰圖式的互動頁面）、speedscope（JSON）或 text
+    """
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer, ConsoleRenderer
+
+    renderers = {
+        "html": HTMLRenderer,
+        "speedscope": SpeedscopeRenderer,
+        "text": lambda: ConsoleRenderer(unicode=True, color=False),
+    }
+    return renderers[output_format]().render(profile["session"])
+
+
+class ProfilingMiddleware:
+    """
+    依需求對單一請求進行取樣式 profiling (ASGI middleware)
+    - 管理員的請求帶有 X-Profile 標頭，或依 PROFILE_SAMPLE_RATE 隨機抽樣時啟用
+    - 使用 pyinstrument（async 模式），可看到 bcrypt、資料庫 await 與序列化的耗時
+    - 未設定 PROFILE_ENABLED 時不會掛上此 middleware，沒有任何額外成本
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        requested = PROFILE_HEADER in headers and await _is_admin_request(headers)
+        sampled = not requested and self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (requested or sampled):
+            return await self.app(scope, receive, send)
+
+        from pyinstrument import Profiler
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session = profiler.stop()
+            route = scope.get("route")
+            profile = {
+                "id": uuid.uuid4().hex,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "route": getattr(route, "path", scope.get("path")),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "trigger": "header" if requested else "sample",
+                "request_id": scope.get("state", {}).get("request_id"),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "session": session,
+            }
+            profile_store.add(profile)
+            logger.info("request profiled", extra={"fields": {
+                "profile_id": profile["id"], "route": profile["route"], "duration_ms": profile["duration_ms"]}})
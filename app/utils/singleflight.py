@@ -0,0 +1,62 @@
+import asyncio
+import functools
+from typing import Awaitable, Callable, Hashable
+
+# 所有 single-flight 群組，供統計使用
+_groups: dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    相同 key 的並發呼叫只執行一次，其餘呼叫等待並共用同一個結果
+    - 共用的工作以獨立的 task 執行，個別呼叫者被取消時不影響其他等待者
+    - 結果會被多個呼叫者共用，呼叫者不應修改回傳值
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executed = 0
+        self.coalesced = 0
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable]):
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+def single_flight(name: str):
+    """
+    將非同步讀取函式包裝成 single-flight，以位置參數作為 key（參數需可雜湊）
+    - 被包裝的函式應自行建立資料庫 session，不可使用請求的 session
+    """
+    group = SingleFlight(name)
+    _groups[name] = group
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args):
+            return await group.do(args, lambda: func(*args))
+
+        wrapper.single_flight = group
+        return wrapper
+
+    return decorator
+
+
+def single_flight_stats() -> dict:
+    return {name: group.stats() for name, group in _groups.items()}
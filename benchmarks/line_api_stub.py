@@ -0,0 +1,147 @@
+"""
+LINE Messaging API 本地替身伺服器
+
+提供 push / multicast / reply / profile 端點，記錄收到的請求數與收件人數，支援 X-Line-Retry-Key，
+可設定回應延遲與失敗率（回傳 500，或依 --rate-limit 回傳 429），用於在不連線 LINE 的情況下
+測試推播活動與各項發送流程。將 .env 的 LINE_API_BASE_URL 指向此伺服器即可：
+
+    python -m benchmarks.line_api_stub --port 9000 --latency-ms 50 --error-rate 0.01
+    LINE_API_BASE_URL=http://127.0.0.1:9000
+
+GET /stats 查看統計，DELETE /stats 歸零。tests/ 直接以 ASGI 呼叫此 app，並修改 config / not_found_users
+模擬回應遺失與查無個人資料。
+"""
+import argparse
+import asyncio
+import random
+from collections import Counter
+from typing import Optional
+import uvicorn
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI()
+
+# lost_responses：接下來幾個已接受的請求改回傳 500，模擬送達後回應遺失
+config = {"latency_ms": 0.0, "error_rate": 0.0, "rate_limit": False, "lost_responses": 0}
+stats = Counter()
+# 已接受的 X-Line-Retry-Key，重複的請求回傳 409
+accepted_retry_keys = set()
+# 查詢個人資料時回傳 404 的使用者（已封鎖或非好友）
+not_found_users = set()
+
+
+async def simulate(authorization: Optional[str], endpoint: str, recipients: int = 1,
+                   retry_key: Optional[str] = None):
+    """
+    模擬 LINE API 的延遲與錯誤，成功時回傳 None
+    """
+    stats[f"{endpoint}.requests"] += 1
+
+    if retry_key and retry_key in accepted_retry_keys:
+        stats[f"{endpoint}.duplicates"] += 1
+        return JSONResponse({"message": "The retry key is already accepted"}, status_code=409)
+
+    if config["latency_ms"]:
+        await asyncio.sleep(config["latency_ms"] / 1000)
+
+    if not authorization or not authorization.startswith("Bearer "):
+        stats[f"{endpoint}.unauthorized"] += 1
+        return JSONResponse({"message": "Authentication failed"}, status_code=401)
+
+    if random.random() < config["error_rate"]:
+        stats[f"{endpoint}.errors"] += 1
+        if config["rate_limit"]:
+            return JSONResponse({"message": "The API rate limit has been exceeded."}, status_code=429)
+        return JSONResponse({"message": "Internal server error"}, status_code=500)
+
+    if retry_key:
+        accepted_retry_keys.add(retry_key)
+    stats[f"{endpoint}.recipients"] += recipients
+
+    if config["lost_responses"]:
+        config["lost_responses"] -= 1
+        stats[f"{endpoint}.lost_responses"] += 1
+        return JSONResponse({"message": "Internal server error"}, status_code=500)
+    return None
+
+
+@app.post("/v2/bot/message/push")
+async def push(request: Request, authorization: Optional[str] = Header(None),
+               x_line_retry_key: Optional[str] = Header(None)):
+    body = await request.json()
+    error = await simulate(authorization, "push", retry_key=x_line_retry_key)
+    if error:
+        return error
+    stats["messages"] += len(body.get("messages", []))
+    return {}
+
+
+@app.post("/v2/bot/message/multicast")
+async def multicast(request: Request, authorization: Optional[str] = Header(None),
+                    x_line_retry_key: Optional[str] = Header(None)):
+    body = await request.json()
+    to = body.get("to", [])
+    if len(to) > 500:
+        return JSONResponse({"message": "Size of to must be between 1 and 500"}, status_code=400)
+
+    error = await simulate(authorization, "multicast", len(to), retry_key=x_line_retry_key)
+    if error:
+        return error
+    stats["messages"] += len(body.get("messages", [])) * len(to)
+    return {}
+
+
+@app.post("/v2/bot/message/reply")
+async def reply(request: Request, authorization: Optional[str] = Header(None)):
+    body = await request.json()
+    error = await simulate(authorization, "reply")
+    if error:
+        return error
+    stats["messages"] += len(body.get("messages", []))
+    return {}
+
+
+@app.get("/v2/bot/profile/{line_user_id}")
+async def profile(line_user_id: str, authorization: Optional[str] = Header(None)):
+    error = await simulate(authorization, "profile")
+    if error:
+        return error
+    if line_user_id in not_found_users:
+        stats["profile.not_found"] += 1
+        return JSONResponse({"message": "Not found"}, status_code=404)
+    return {
+        "userId": line_user_id,
+        "displayName": f"LINE {line_user_id[-6:]}",
+        "pictureUrl": f"https://profile.line-scdn.net/{line_user_id}",
+        "language": "zh-TW",
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return dict(stats)
+
+
+@app.delete("/stats")
+async def reset_stats():
+    stats.clear()
+    accepted_retry_keys.clear()
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LINE Messaging API 本地替身伺服器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每個請求的回應延遲")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="隨機失敗的比例 (0~1)")
+    parser.add_argument("--rate-limit", action="store_true", help="失敗時回傳 429 而非 500")
+    args = parser.parse_args()
+
+    config.update(latency_ms=args.latency_ms, error_rate=args.error_rate, rate_limit=args.rate_limit)
+    uvicorn.run(app, host=args.host, port=args.port, access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+列表查詢效能比較：ORM 路徑 vs Core 快速路徑
+
+使用 .env 中的 DATABASE_URL，建立一個測試帳號與 N 位使用者，
+分別以兩種方式讀取並序列化，輸出每秒處理的資料列數，結束後刪除測試資料。
+
+    python -m benchmarks.list_read_benchmark --users 20000 --rounds 5
+
+資料表不存在時會先建立，可直接對 SQLite 執行：
+
+    DATABASE_URL=sqlite+aiosqlite:////tmp/bench.db python -m benchmarks.list_read_benchmark
+
+參考結果（SQLite 3.40 / aiosqlite、Python 3.11、單核心）：
+
+    users=20000 rounds=5
+    orm          10,447 rows/sec  (1914.4 ms/round)
+    core         42,554 rows/sec  (470.0 ms/round)
+    users=2000 rounds=20
+    orm          10,418 rows/sec  (192.0 ms/round)
+    core         42,420 rows/sec  (47.1 ms/round)
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, insert
+from sqlalchemy.future import select
+from app.database import SessionLocal, engine
+from app.db.init_db import create_tables
+from app.models.account import Account, BindType
+from app.models.user import User, UserStatus
+from app.routers.users import USER_ROW_COLUMNS
+from app.schemas.user import UserResponse, user_rows_adapter
+
+
+async def seed(user_count: int) -> int:
+    async with SessionLocal() as session:
+        account = Account(
+            email=f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            password="x",
+            bind_type=BindType.SECRET,
+            created_by="benchmark",
+        )
+        session.add(account)
+        await session.flush()
+        account_id = account.id
+
+        rows = [
+            {
+                "account_id": account_id,
+                "line_user_id": f"U{i:032d}",
+                "user_code": f"E{i}",
+                "user_name": f"user {i}",
+                "bind_type": BindType.SECRET,
+                "bind_word": "secret",
+                "status": UserStatus.BOUND,
+                "created_by": "benchmark",
+            }
+            for i in range(user_count)
+        ]
+        for start in range(0, len(rows), 5000):
+            await session.execute(insert(User), rows[start:start + 5000])
+        await session.commit()
+        return account_id
+
+
+async def cleanup(account_id: int):
+    async with SessionLocal() as session:
+        # SQLite 預設不啟用外鍵，不會 ON DELETE CASCADE，先刪除使用者
+        await session.execute(delete(User).where(User.account_id == account_id))
+        await session.execute(delete(Account).where(Account.id == account_id))
+        await session.commit()
+
+
+async def orm_path(account_id: int) -> int:
+    async with SessionLocal() as session:
+        result = await session.execute(select(User).filter(User.account_id == account_id))
+        users = result.scalars().all()
+        data = jsonable_encoder(
+            [UserResponse.model_validate(user) for user in users])
+        return len(data)
+
+
+async def core_path(account_id: int) -> int:
+    async with SessionLocal() as session:
+        result = await session.execute(select(*USER_ROW_COLUMNS).filter(User.account_id == account_id))
+        users = [dict(row) for row in result.mappings()]
+        data = user_rows_adapter.dump_python(users, mode="json")
+        return len(data)
+
+
+async def measure(name: str, func, account_id: int, rounds: int):
+    await func(account_id)  # 預熱
+    rows = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        rows += await func(account_id)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<6} {rows / elapsed:>12,.0f} rows/sec  ({elapsed / rounds * 1000:.1f} ms/round)")
+
+
+async def main(user_count: int, rounds: int):
+    await create_tables()
+    account_id = await seed(user_count)
+    try:
+        print(f"users={user_count} rounds={rounds}")
+        await measure("orm", orm_path, account_id, rounds)
+        await measure("core", core_path, account_id, rounds)
+    finally:
+        await cleanup(account_id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.rounds))
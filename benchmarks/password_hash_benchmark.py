@@ -0,0 +1,71 @@
+"""
+密碼雜湊成本比較：各 bcrypt cost 的驗證延遲與每核心每秒可處理的登入數
+
+    python -m benchmarks.password_hash_benchmark --min-rounds 10 --max-rounds 14 --samples 5 --target-ms 250
+
+最後輸出驗證中位數不超過 --target-ms 的最高成本，作為 PASSWORD_BCRYPT_ROUNDS 的建議值。
+請在正式環境的硬體上執行，並讓所有 worker 使用相同設定。
+
+開啟 PASSWORD_AUTO_CALIBRATE 時，加上 --save 將建議值寫入資料庫（.env 的 DATABASE_URL），
+取代啟動時的快速校準結果，所有 worker 重新啟動後生效。
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import bcrypt
+
+
+def measure_verify(rounds: int, samples: int) -> list:
+    password = b"Benchmark123!"
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.checkpw(password, hashed)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def save(rounds: int):
+    from sqlalchemy import delete, insert
+    from app.database import SessionLocal, engine
+    from app.models.system_setting import SystemSetting
+    from app.utils.password import PasswordPolicy
+
+    async with SessionLocal() as session:
+        await session.execute(delete(SystemSetting).where(SystemSetting.key == PasswordPolicy.SETTING_KEY))
+        await session.execute(insert(SystemSetting).values(key=PasswordPolicy.SETTING_KEY, value=str(rounds)))
+        await session.commit()
+    await engine.dispose()
+
+
+def main(min_rounds: int, max_rounds: int, samples: int, target_ms: float, save_result: bool):
+    recommended = None
+    print(f"{'cost':>4}  {'median ms':>10}  {'p95 ms':>8}  {'logins/sec/core':>16}")
+    for rounds in range(min_rounds, max_rounds + 1):
+        timings = sorted(measure_verify(rounds, samples))
+        median = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{rounds:>4}  {median * 1000:>10.1f}  {p95 * 1000:>8.1f}  {1 / median:>16.1f}")
+        if median * 1000 <= target_ms:
+            recommended = rounds
+
+    if recommended is None:
+        print(f"cost {min_rounds} 已超過目標 {target_ms:.0f} ms，請降低 --min-rounds")
+    else:
+        print(f"建議 PASSWORD_BCRYPT_ROUNDS={recommended}（目標 {target_ms:.0f} ms）")
+        if save_result:
+            asyncio.run(save(recommended))
+            print("已寫入共用的校準結果")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=250, help="目標驗證時間（毫秒）")
+    parser.add_argument("--save", action="store_true", help="將建議值寫入資料庫，供自動校準的 worker 共用")
+    args = parser.parse_args()
+    main(args.min_rounds, args.max_rounds, args.samples, args.target_ms, args.save)
@@ -0,0 +1,112 @@
+"""
+LINE 個人資料回補效能測試
+
+需先啟動 LINE API 替身伺服器，並將 LINE_API_BASE_URL 指向它：
+
+    python -m benchmarks.line_api_stub --port 9000 --latency-ms 50
+    LINE_API_BASE_URL=http://127.0.0.1:9000 python -m benchmarks.profile_backfill_benchmark --users 5000
+
+使用 .env 中的 DATABASE_URL 建立測試帳號與 N 位使用者，輸出：
+- 回補速度（每秒同步的使用者數），受 LINE_API_MAX_CONNECTIONS 與替身延遲影響
+- 同一使用者 --concurrent 個並發查詢實際送出的請求數（single-flight）與快取命中後的查詢時間
+結束後刪除測試資料。
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from sqlalchemy import delete, insert, func
+from sqlalchemy.future import select
+from app.database import SessionLocal, engine
+from app.models.account import Account, BindType
+from app.models.user import User, UserStatus
+from app.tasks.profile_backfill import backfill_profiles
+from app.utils.line_api import line_client
+from app.utils.line_profile import get_line_profile
+from app.utils.singleflight import single_flight_stats
+
+
+async def seed(user_count: int) -> int:
+    async with SessionLocal() as session:
+        account = Account(
+            email=f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            password="x",
+            channel_token="benchmark-token",
+            bind_type=BindType.SECRET,
+            created_by="benchmark",
+        )
+        session.add(account)
+        await session.flush()
+        account_id = account.id
+
+        rows = [
+            {
+                "account_id": account_id,
+                "line_user_id": f"U{uuid.uuid4().hex}",
+                "bind_type": BindType.SECRET,
+                "status": UserStatus.BOUND,
+                "created_by": "benchmark",
+            }
+            for _ in range(user_count)
+        ]
+        for start in range(0, len(rows), 5000):
+            await session.execute(insert(User), rows[start:start + 5000])
+        await session.commit()
+        return account_id
+
+
+async def cleanup(account_id: int):
+    async with SessionLocal() as session:
+        await session.execute(delete(Account).where(Account.id == account_id))
+        await session.commit()
+
+
+async def measure_backfill(account_id: int, user_count: int):
+    started = time.perf_counter()
+    updated, failed = await backfill_profiles(batch_sleep=0, account_id=account_id)
+    elapsed = time.perf_counter() - started
+
+    async with SessionLocal() as session:
+        result = await session.execute(
+            select(func.count(User.id)).filter(
+                User.account_id == account_id, User.profile_synced_at.isnot(None)))
+        synced = result.scalar_one()
+
+    print(f"backfill  {updated / elapsed:>10,.0f} users/sec  "
+          f"({elapsed:.2f}s, updated={updated} failed={failed} synced={synced}/{user_count})")
+
+
+async def measure_coalescing(account_id: int, concurrent: int):
+    line_user_id = f"U{uuid.uuid4().hex}"
+    executed = single_flight_stats()["line_profile"]["executed"]
+
+    await asyncio.gather(*(get_line_profile(account_id, line_user_id, "benchmark-token")
+                           for _ in range(concurrent)))
+    executed = single_flight_stats()["line_profile"]["executed"] - executed
+    print(f"coalesce  {concurrent} concurrent lookups -> {executed} request(s)")
+
+    started = time.perf_counter()
+    for _ in range(concurrent):
+        await get_line_profile(account_id, line_user_id, "benchmark-token")
+    elapsed = time.perf_counter() - started
+    print(f"cached    {elapsed / concurrent * 1_000_000:.1f} µs/lookup")
+
+
+async def main(user_count: int, concurrent: int):
+    account_id = await seed(user_count)
+    try:
+        print(f"users={user_count} concurrent={concurrent}")
+        await measure_backfill(account_id, user_count)
+        await measure_coalescing(account_id, concurrent)
+    finally:
+        await cleanup(account_id)
+        await line_client.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--concurrent", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.concurrent))
@@ -1,4 +1,6 @@
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # 存取日誌由 AccessLogMiddleware 輸出，關閉 uvicorn 內建的存取日誌
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000,
+                reload=True, access_log=False)
@@ -0,0 +1,89 @@
+"""
+測試共用設定
+- 使用暫存的 SQLite 資料庫（需在匯入 app 之前設定 DATABASE_URL）
+- line_client 以 ASGI 直接呼叫 benchmarks.line_api_stub，不需啟動替身伺服器
+- api 以 ASGI 直接呼叫 app（不執行 lifespan，背景排程不會啟動）
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="line-bind-test-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/test.db"
+
+import httpx
+import pytest
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models.account import Account, BindType, RoleType
+from app.utils.invalidation import invalidation_bus
+from app.utils.jwt import create_jwt_token
+from app.utils.line_api import line_client
+from benchmarks import line_api_stub
+
+
+@pytest.fixture(autouse=True)
+async def database():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    # 每個測試的資料庫都是新的，清空各快取避免沿用前一個測試的帳號
+    invalidation_bus._clear_all()
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def api():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def auth_headers(account: Account) -> dict:
+    token = create_jwt_token({"account_id": account.id, "role": account.role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+async def line_stub():
+    line_api_stub.stats.clear()
+    line_api_stub.accepted_retry_keys.clear()
+    line_api_stub.not_found_users.clear()
+    line_api_stub.config.update(latency_ms=0.0, error_rate=0.0, rate_limit=False, lost_responses=0)
+
+    line_client._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=line_api_stub.app), base_url="http://line-stub")
+    yield line_api_stub
+    await line_client.close()
+
+
+@pytest.fixture
+async def account() -> Account:
+    async with SessionLocal() as session:
+        account = Account(
+            email="test@example.com",
+            password="x",
+            channel_token="test-token",
+            bind_type=BindType.SECRET,
+            created_by="test",
+        )
+        session.add(account)
+        await session.commit()
+        await session.refresh(account)
+        return account
+
+
+@pytest.fixture
+async def admin() -> Account:
+    async with SessionLocal() as session:
+        admin = Account(email="admin@example.com", password="x", role=RoleType.ADMIN, created_by="test")
+        session.add(admin)
+        await session.commit()
+        await session.refresh(admin)
+        return admin
+
+
+@pytest.fixture
+def admin_headers(admin: Account) -> dict:
+    token = create_jwt_token({"account_id": admin.id, "role": admin.role.value})
+    return {"Authorization": f"Bearer {token}"}
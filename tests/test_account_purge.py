@@ -0,0 +1,58 @@
+import asyncio
+from sqlalchemy import insert
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.account import Account
+from app.models.user import User
+from app.models.user_tombstone import UserTombstone
+from app.tasks.account_purge import get_purge_job
+
+
+async def test_large_account_is_purged_in_background(api, account, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_BATCH_SLEEP", 0.0)
+    async with SessionLocal() as session:
+        await session.execute(insert(User), [
+            {"account_id": account.id, "line_user_id": f"U{i:04d}"} for i in range(5)])
+        await session.commit()
+
+    response = await api.delete(f"/api/accounts/{account.id}", headers=admin_headers)
+    assert response.status_code == 202
+    assert response.json()["data"]["total_users"] == 5
+    assert "task" not in response.json()["data"]
+
+    await get_purge_job(account.id).task
+
+    response = await api.get(f"/api/accounts/{account.id}/purge", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["status"] == "completed"
+    assert data["deleted_users"] == 5
+
+    async with SessionLocal() as session:
+        assert (await session.execute(select(Account.id).filter(Account.id == account.id))).first() is None
+        tombstones = (await session.execute(select(UserTombstone.user_id))).all()
+    assert len(tombstones) == 5
+
+
+async def test_purge_in_progress_reports_job(api, account, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_THRESHOLD", 0)
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "ACCOUNT_PURGE_BATCH_SLEEP", 0.05)
+    async with SessionLocal() as session:
+        await session.execute(insert(User), [
+            {"account_id": account.id, "line_user_id": f"U{i:04d}"} for i in range(3)])
+        await session.commit()
+
+    first = await api.delete(f"/api/accounts/{account.id}", headers=admin_headers)
+    second = await api.delete(f"/api/accounts/{account.id}", headers=admin_headers)
+    status = await api.get(f"/api/accounts/{account.id}/purge", headers=admin_headers)
+
+    assert first.status_code == 202
+    assert second.status_code == 202
+    assert second.json()["message"] == "Account purge in progress"
+    assert status.status_code == 200
+    assert status.json()["data"]["status"] == "running"
+    await asyncio.wait_for(get_purge_job(account.id).task, 5)
@@ -0,0 +1,112 @@
+import asyncio
+from sqlalchemy import update
+from app.database import SessionLocal
+from app.models.account import Account, RoleType
+from app.utils import account_state as account_state_module
+from app.utils.account_state import AccountState, account_states
+from app.utils.invalidation import invalidation_bus
+
+
+async def read_own_account(api, account, headers):
+    return await api.get(f"/api/accounts/{account.id}", headers=headers)
+
+
+async def set_account(account_id: int, **values):
+    async with SessionLocal() as session:
+        await session.execute(update(Account).where(Account.id == account_id).values(**values))
+        await session.commit()
+
+
+def session_calling(callback):
+    """
+    查詢完成、回傳結果之前呼叫 callback，模擬查詢期間收到的失效通知
+    """
+    def factory():
+        session = SessionLocal()
+        execute = session.execute
+
+        async def execute_then_call(*args, **kwargs):
+            result = await execute(*args, **kwargs)
+            callback()
+            return result
+
+        session.execute = execute_then_call
+        return session
+    return factory
+
+
+async def test_disabled_account_is_rejected(api, account, auth_headers, admin_headers):
+    assert (await read_own_account(api, account, auth_headers)).status_code == 200
+
+    response = await api.put(f"/api/accounts/{account.id}", headers=admin_headers,
+                             json={"password": "unused-password", "bind_type": "secret", "status": False})
+    assert response.status_code == 200
+
+    response = await read_own_account(api, account, auth_headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "帳號已停用或不存在"
+
+
+async def test_deleted_account_is_rejected(api, account, auth_headers, admin_headers):
+    assert (await read_own_account(api, account, auth_headers)).status_code == 200
+
+    response = await api.delete(f"/api/accounts/{account.id}", headers=admin_headers)
+    assert response.status_code == 200
+
+    response = await read_own_account(api, account, auth_headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "帳號已停用或不存在"
+
+
+async def test_role_change_takes_effect_after_publish(api, account, auth_headers):
+    assert (await read_own_account(api, account, auth_headers)).status_code == 200
+
+    # 快取命中時不查資料庫，收到失效通知後才會讀到新的角色
+    await set_account(account.id, role=RoleType.ADMIN)
+    assert (await read_own_account(api, account, auth_headers)).status_code == 200
+
+    await invalidation_bus.publish("account_state", account.id)
+
+    response = await read_own_account(api, account, auth_headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "帳號權限已變更，請重新登入"
+
+
+async def test_get_discards_state_invalidated_during_load(account, monkeypatch):
+    loaded = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_load(account_id: int) -> AccountState:
+        loaded.set()
+        await release.wait()
+        return AccountState(status=True, role=RoleType.USER)
+
+    monkeypatch.setattr(account_state_module, "_load_account_state", slow_load)
+    pending = asyncio.create_task(account_states.get(account.id))
+    await loaded.wait()
+    account_states.invalidate(account.id)
+    release.set()
+
+    assert (await pending).status is True
+    assert account.id not in account_states._states
+
+
+async def test_refresh_skips_only_accounts_invalidated_during_query(account, admin, monkeypatch):
+    await account_states.refresh(full=True)
+    await set_account(account.id, status=False)
+    await set_account(admin.id, status=False)
+
+    monkeypatch.setattr(account_state_module, "SessionLocal",
+                        session_calling(lambda: account_states.invalidate(account.id)))
+    await account_states.refresh()
+
+    # 查詢期間失效的帳號不放回快取，其餘帳號照常更新
+    assert account.id not in account_states._states
+    assert account_states._states[admin.id].status is False
+
+
+async def test_refresh_is_discarded_when_cache_is_cleared(account, monkeypatch):
+    monkeypatch.setattr(account_state_module, "SessionLocal", session_calling(account_states.clear))
+    await account_states.refresh(full=True)
+
+    assert account_states._states == {}
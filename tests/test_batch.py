@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.routers import batch
+
+DRIVER_MESSAGE = 'duplicate key value violates unique constraint "account_email_key"'
+
+
+@pytest.fixture
+def failing_operation(monkeypatch):
+    def fail_with(error):
+        async def run_operation(*args):
+            raise error
+        monkeypatch.setattr(batch, "_run_operation", run_operation)
+    return fail_with
+
+
+@pytest.mark.parametrize("atomic", [True, False])
+async def test_integrity_error_hides_driver_message(api, admin_headers, failing_operation, atomic):
+    failing_operation(IntegrityError("UPDATE account SET email=$1", {}, Exception(DRIVER_MESSAGE)))
+    body = {"atomic": atomic, "operations": [{"op": "delete_user", "id": 1}]}
+
+    response = await api.post("/api/batch", json=body, headers=admin_headers)
+
+    result = (response.json()["errors"] if atomic else response.json()["data"])["results"][0]
+    assert result["status"] == 409
+    assert result["message"] == "Conflict with existing data"
+    assert "account_email_key" not in response.text
+    assert "UPDATE account" not in response.text
+
+
+async def test_other_database_error_is_generic(api, admin_headers, failing_operation):
+    failing_operation(OperationalError("SELECT 1", {}, Exception("server closed the connection")))
+    body = {"atomic": False, "operations": [{"op": "delete_user", "id": 1}]}
+
+    response = await api.post("/api/batch", json=body, headers=admin_headers)
+
+    result = response.json()["data"]["results"][0]
+    assert result["status"] == 500
+    assert result["message"] == "Database error"
+    assert "server closed" not in response.text
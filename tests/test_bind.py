@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from sqlalchemy.future import select
+from app.database import SessionLocal
+from app.models.account import Account, BindType
+from app.models.email_verify_code import EmailVerifyCode
+from app.models.user import User, UserStatus
+
+EMAIL = "member@example.com"
+
+
+@pytest.fixture
+async def email_user(account) -> int:
+    async with SessionLocal() as session:
+        await session.execute(update(Account).where(Account.id == account.id).values(bind_type=BindType.EMAIL))
+        user = User(account_id=account.id, line_user_id="U0001", status=UserStatus.UNBOUND)
+        session.add(user)
+        await session.flush()
+        session.add(EmailVerifyCode(account_id=account.id, user_id=user.id, email=EMAIL, verify_code="123456",
+                                    efficient_time=datetime.now() + timedelta(minutes=10),
+                                    created_at=datetime.now()))
+        user_id = user.id
+        await session.commit()
+    return user_id
+
+
+def bind_body(account, verify_code: str = "123456") -> dict:
+    return {"account_id": account.id, "line_user_id": "U0001", "bind_word": EMAIL, "verify_code": verify_code}
+
+
+async def count_codes() -> int:
+    async with SessionLocal() as session:
+        result = await session.execute(select(EmailVerifyCode.id))
+        return len(result.all())
+
+
+async def test_email_bind_consumes_code(api, account, auth_headers, email_user):
+    response = await api.post("/api/bind", json=bind_body(account), headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["data"]["status"] == UserStatus.BOUND.value
+    assert await count_codes() == 0
+
+
+async def test_email_bind_retry_replays_without_code(api, account, auth_headers, email_user):
+    first = await api.post("/api/bind", json=bind_body(account), headers=auth_headers)
+    retry = await api.post("/api/bind", json=bind_body(account), headers=auth_headers)
+
+    assert first.status_code == 200
+    # 驗證碼已在第一次綁定時刪除，重試仍回傳已綁定的使用者
+    assert retry.status_code == 200
+    assert retry.json()["message"] == "User already bound"
+    assert retry.json()["data"]["id"] == email_user
+
+
+async def test_email_bind_rejects_wrong_code(api, account, auth_headers, email_user):
+    response = await api.post("/api/bind", json=bind_body(account, "000000"), headers=auth_headers)
+
+    assert response.status_code == 400
+    assert await count_codes() == 1
+    async with SessionLocal() as session:
+        result = await session.execute(select(User.status).filter(User.id == email_user))
+        assert result.scalar_one() == UserStatus.UNBOUND
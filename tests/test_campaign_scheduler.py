@@ -0,0 +1,217 @@
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert, update
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.account import BindType
+from app.models.campaign import Campaign, CampaignStatus
+from app.models.user import User, UserStatus
+from app.tasks import campaign_scheduler as scheduler_module
+from app.tasks.campaign_scheduler import CampaignScheduler, claim_campaign, dispatch_campaign, _send_campaign
+from app.utils.line_api import line_client
+
+MESSAGES = [{"type": "text", "text": "hello"}]
+
+
+@pytest.fixture(autouse=True)
+def fast_dispatch(monkeypatch):
+    monkeypatch.setattr(settings, "CAMPAIGN_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "CAMPAIGN_BATCHES_PER_SECOND", 1000)
+    monkeypatch.setattr(scheduler_module, "SEND_BACKOFF", 0.0)
+
+
+async def seed_users(account_id: int, count: int, **values) -> list[int]:
+    values.setdefault("status", UserStatus.BOUND)
+    rows = [
+        {"account_id": account_id, "line_user_id": f"U{account_id}-{values['status'].value}-{i:04d}", **values}
+        for i in range(count)
+    ]
+    async with SessionLocal() as session:
+        result = await session.execute(insert(User).returning(User.id), rows)
+        ids = list(result.scalars())
+        await session.commit()
+    return ids
+
+
+async def create_campaign(account_id: int, **values) -> int:
+    values.setdefault("scheduled_at", datetime.now() - timedelta(seconds=1))
+    async with SessionLocal() as session:
+        campaign = Campaign(account_id=account_id, name="test", messages=MESSAGES, **values)
+        session.add(campaign)
+        await session.flush()
+        campaign_id = campaign.id
+        await session.commit()
+    return campaign_id
+
+
+async def get_campaign(campaign_id: int) -> Campaign:
+    async with SessionLocal() as session:
+        result = await session.execute(select(Campaign).filter(Campaign.id == campaign_id))
+        return result.scalars().first()
+
+
+async def test_claim_campaign_only_one_worker_wins(account):
+    campaign_id = await create_campaign(account.id)
+
+    results = await asyncio.gather(*(claim_campaign(campaign_id) for _ in range(5)))
+
+    tokens = [token for token in results if token is not None]
+    assert len(tokens) == 1
+    campaign = await get_campaign(campaign_id)
+    assert campaign.status == CampaignStatus.RUNNING
+    assert campaign.claim_token == tokens[0]
+    assert campaign.locked_until > datetime.now()
+
+
+async def test_claim_campaign_waits_for_scheduled_time(account):
+    campaign_id = await create_campaign(account.id, scheduled_at=datetime.now() + timedelta(hours=1))
+
+    assert await claim_campaign(campaign_id) is None
+
+
+async def expire_lease(campaign_id: int):
+    async with SessionLocal() as session:
+        await session.execute(update(Campaign).where(Campaign.id == campaign_id)
+                              .values(locked_until=datetime.now() - timedelta(seconds=1)))
+        await session.commit()
+
+
+async def test_expired_lease_can_be_reclaimed(account):
+    campaign_id = await create_campaign(account.id)
+    first = await claim_campaign(campaign_id)
+    assert first is not None
+    assert await claim_campaign(campaign_id) is None
+
+    await expire_lease(campaign_id)
+
+    second = await claim_campaign(campaign_id)
+    assert second not in (None, first)
+    assert (await get_campaign(campaign_id)).claim_token == second
+
+
+async def test_stale_worker_cannot_write_after_reclaim(account, line_stub):
+    await seed_users(account.id, 5)
+    campaign_id = await create_campaign(account.id)
+    stale = await claim_campaign(campaign_id)
+    await expire_lease(campaign_id)
+    current = await claim_campaign(campaign_id)
+
+    # 舊 worker 送出第一批後寫回進度失敗，立即停止，也不能結束活動
+    await _send_campaign(campaign_id, stale)
+    campaign = await get_campaign(campaign_id)
+    assert campaign.status == CampaignStatus.RUNNING
+    assert campaign.claim_token == current
+    assert campaign.last_user_id == 0
+    assert campaign.sent_count == 0
+    assert line_stub.stats["multicast.requests"] == 1
+
+    # 新的 worker 從頭發送，第一批的 retry key 相同，LINE 回傳 409 不會重複送達
+    await _send_campaign(campaign_id, current)
+    campaign = await get_campaign(campaign_id)
+    assert campaign.status == CampaignStatus.COMPLETED
+    assert campaign.sent_count == 5
+    assert campaign.claim_token is None
+    assert line_stub.stats["multicast.duplicates"] == 1
+    assert line_stub.stats["multicast.recipients"] == 5
+
+
+def test_lease_covers_worst_case_batch(monkeypatch):
+    monkeypatch.setattr(settings, "CAMPAIGN_LEASE_SECONDS", 60)
+    monkeypatch.setattr(scheduler_module, "SEND_BACKOFF", 1.0)
+    monkeypatch.setattr(line_client, "timeout", 10)
+    # 最多 4 次 × 10 秒，加上 1 + 2 + 4 秒退避
+    assert scheduler_module.lease_seconds() == 94
+
+    monkeypatch.setattr(settings, "CAMPAIGN_LEASE_SECONDS", 120)
+    assert scheduler_module.lease_seconds() == 120
+
+
+async def test_dispatch_pages_recipients_by_keyset(account, line_stub):
+    user_ids = await seed_users(account.id, 5)
+    await seed_users(account.id, 3, status=UserStatus.UNBOUND)
+    campaign_id = await create_campaign(account.id, target_status=UserStatus.BOUND)
+
+    await dispatch_campaign(campaign_id)
+
+    campaign = await get_campaign(campaign_id)
+    assert campaign.status == CampaignStatus.COMPLETED
+    assert campaign.sent_count == 5
+    assert campaign.failed_count == 0
+    assert campaign.last_user_id == user_ids[-1]
+    assert campaign.locked_until is None
+    # 批次大小 2：2 + 2 + 1
+    assert line_stub.stats["multicast.requests"] == 3
+    assert line_stub.stats["multicast.recipients"] == 5
+
+
+async def test_dispatch_resumes_after_last_user_id(account, line_stub):
+    user_ids = await seed_users(account.id, 5, bind_type=BindType.EMAIL)
+    campaign_id = await create_campaign(account.id, status=CampaignStatus.RUNNING, last_user_id=user_ids[2],
+                                        sent_count=3, locked_until=datetime.now() - timedelta(seconds=1))
+
+    await dispatch_campaign(campaign_id)
+
+    campaign = await get_campaign(campaign_id)
+    assert campaign.status == CampaignStatus.COMPLETED
+    assert campaign.sent_count == 5
+    assert line_stub.stats["multicast.recipients"] == 2
+
+
+async def test_lost_response_is_retried_with_same_retry_key(account, line_stub):
+    await seed_users(account.id, 2)
+    campaign_id = await create_campaign(account.id)
+    line_stub.config["lost_responses"] = 1
+
+    await dispatch_campaign(campaign_id)
+
+    campaign = await get_campaign(campaign_id)
+    assert campaign.status == CampaignStatus.COMPLETED
+    assert campaign.sent_count == 2
+    assert campaign.failed_count == 0
+    # 重試帶相同的 retry key，LINE 回傳 409，不會重複送達
+    assert line_stub.stats["multicast.duplicates"] == 1
+    assert line_stub.stats["multicast.recipients"] == 2
+
+
+async def test_resync_orders_heap_by_due_time(account):
+    now = datetime.now()
+    later = await create_campaign(account.id, scheduled_at=now + timedelta(minutes=10))
+    sooner = await create_campaign(account.id, scheduled_at=now + timedelta(minutes=5))
+    # 執行中的活動在租約到期後才能接手
+    leased = await create_campaign(account.id, scheduled_at=now - timedelta(minutes=1),
+                                   status=CampaignStatus.RUNNING, locked_until=now + timedelta(minutes=7))
+    await create_campaign(account.id, status=CampaignStatus.COMPLETED)
+
+    scheduler = CampaignScheduler(resync_interval=60)
+    await scheduler._resync()
+
+    order = [heapq.heappop(scheduler._heap)[1] for _ in range(len(scheduler._heap))]
+    assert order == [sooner, leased, later]
+
+
+async def test_scheduler_wakes_for_new_campaign(account, line_stub):
+    await seed_users(account.id, 3)
+    future_id = await create_campaign(account.id, scheduled_at=datetime.now() + timedelta(hours=1))
+
+    scheduler = CampaignScheduler(resync_interval=3600)
+    scheduler.start()
+    try:
+        # 等待第一次同步完成後再加入新的活動
+        await asyncio.sleep(0.1)
+        campaign_id = await create_campaign(account.id, scheduled_at=datetime.now() + timedelta(seconds=0.2))
+        scheduler.schedule(campaign_id, datetime.now() + timedelta(seconds=0.2))
+
+        for _ in range(50):
+            campaign = await get_campaign(campaign_id)
+            if campaign.status == CampaignStatus.COMPLETED:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await scheduler.stop()
+
+    assert campaign.status == CampaignStatus.COMPLETED
+    assert campaign.sent_count == 3
+    assert (await get_campaign(future_id)).status == CampaignStatus.SCHEDULED
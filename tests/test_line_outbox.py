@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from sqlalchemy.future import select
+from app.config import settings
+from app.database import SessionLocal, db_now
+from app.models.line_outbox import LineOutbox, OutboxKind, OutboxStatus
+from app.tasks import line_outbox as outbox_module
+from app.tasks.line_outbox import LineOutboxDispatcher, enqueue_line_message, _apply_result_stmt, _result_params
+from app.utils.line_api import line_client
+
+MESSAGES = [{"type": "text", "text": "hello"}]
+
+
+def new_dispatcher(account_id: int) -> LineOutboxDispatcher:
+    return LineOutboxDispatcher(workers=1, batch_size=10, poll_interval=0.05, account_id=account_id)
+
+
+async def enqueue(account_id: int, kind: OutboxKind = OutboxKind.PUSH) -> int:
+    payload = {"replyToken": "reply-token", "messages": MESSAGES} if kind == OutboxKind.REPLY \
+        else {"to": "U0001", "messages": MESSAGES}
+    async with SessionLocal() as session:
+        message = enqueue_line_message(session, account_id, kind, payload, created_by="test")
+        await session.flush()
+        message_id = message.id
+        await session.commit()
+    return message_id
+
+
+async def get_message(message_id: int) -> LineOutbox:
+    async with SessionLocal() as session:
+        result = await session.execute(select(LineOutbox).filter(LineOutbox.id == message_id))
+        return result.scalars().first()
+
+
+async def expire_lease(message_id: int):
+    async with SessionLocal() as session:
+        await session.execute(update(LineOutbox).where(LineOutbox.id == message_id)
+                              .values(locked_until=datetime.now() - timedelta(seconds=1)))
+        await session.commit()
+
+
+async def test_process_batch_sends_message(account, line_stub):
+    message_id = await enqueue(account.id)
+
+    assert await new_dispatcher(account.id).process_batch() == 1
+
+    message = await get_message(message_id)
+    assert message.status == OutboxStatus.SENT
+    assert message.attempts == 1
+    assert message.sent_at is not None
+    assert message.locked_until is None
+    assert message.claim_token is None
+    assert line_stub.stats["push.requests"] == 1
+
+
+async def test_claim_counts_attempt_and_stamps_token(account):
+    message_id = await enqueue(account.id)
+
+    claimed = await new_dispatcher(account.id)._claim()
+
+    row, channel_token = claimed[0]
+    assert channel_token == "test-token"
+    assert row.attempts == 1
+    message = await get_message(message_id)
+    assert message.status == OutboxStatus.SENDING
+    assert message.attempts == 1
+    assert message.claim_token == row.claim_token
+
+
+async def test_stale_result_does_not_overwrite_new_claim(account, line_stub):
+    message_id = await enqueue(account.id)
+    slow = new_dispatcher(account.id)
+    (row, channel_token), = await slow._claim()
+    stale_result = await slow._deliver(row, channel_token)
+
+    # 租約過期後由另一個 worker 接手並發送；相同 retry key 不會重複送達
+    await expire_lease(message_id)
+    assert await new_dispatcher(account.id).process_batch() == 1
+
+    async with SessionLocal() as session:
+        stale_params = _result_params({**stale_result, "b_status": OutboxStatus.FAILED}, await db_now(session))
+        await session.execute(_apply_result_stmt, [stale_params])
+        await session.commit()
+
+    message = await get_message(message_id)
+    assert message.status == OutboxStatus.SENT
+    assert message.attempts == 2
+    assert line_stub.stats["push.recipients"] == 1
+    assert line_stub.stats["push.duplicates"] == 1
+
+
+async def test_expired_reply_is_not_resent(account, line_stub):
+    message_id = await enqueue(account.id, OutboxKind.REPLY)
+    assert len(await new_dispatcher(account.id)._claim()) == 1
+    await expire_lease(message_id)
+
+    assert await new_dispatcher(account.id).process_batch() == 0
+
+    message = await get_message(message_id)
+    assert message.status == OutboxStatus.FAILED
+    assert line_stub.stats["reply.requests"] == 0
+
+
+@pytest.mark.parametrize("kind, rate_limit, expected", [
+    (OutboxKind.PUSH, False, OutboxStatus.PENDING),
+    (OutboxKind.REPLY, False, OutboxStatus.FAILED),
+    (OutboxKind.REPLY, True, OutboxStatus.PENDING),
+])
+async def test_retry_on_error(account, line_stub, kind, rate_limit, expected):
+    line_stub.config.update(error_rate=1.0, rate_limit=rate_limit)
+    message_id = await enqueue(account.id, kind)
+
+    await new_dispatcher(account.id).process_batch()
+
+    message = await get_message(message_id)
+    assert message.status == expected
+    assert message.last_error.startswith("429" if rate_limit else "500")
+
+
+async def test_retry_is_scheduled_on_database_clock(account, line_stub, monkeypatch):
+    class SkewedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) - timedelta(hours=1)
+
+    # 應用程式時鐘比資料庫慢一小時，重試時間仍以資料庫時間計算
+    monkeypatch.setattr(outbox_module, "datetime", SkewedDatetime)
+    monkeypatch.setattr(settings, "OUTBOX_BACKOFF_BASE", 60)
+    line_stub.config["error_rate"] = 1.0
+    message_id = await enqueue(account.id)
+    dispatcher = new_dispatcher(account.id)
+
+    await dispatcher.process_batch()
+    async with SessionLocal() as session:
+        now = await db_now(session)
+
+    message = await get_message(message_id)
+    assert message.status == OutboxStatus.PENDING
+    assert now + timedelta(seconds=25) < message.next_attempt_at <= now + timedelta(seconds=60)
+    assert await dispatcher.process_batch() == 0
+
+
+def test_lease_covers_worst_case_batch(monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_LEASE_SECONDS", 60)
+    monkeypatch.setattr(line_client, "timeout", 10)
+    monkeypatch.setattr(line_client, "max_connections", 20)
+    # 4 個 worker × 50 筆共用 20 個連線：最多 10 輪，每輪最久 10 秒
+    assert LineOutboxDispatcher(workers=4, batch_size=50, poll_interval=1).lease_seconds == 200
+
+    monkeypatch.setattr(settings, "OUTBOX_LEASE_SECONDS", 300)
+    assert LineOutboxDispatcher(workers=4, batch_size=50, poll_interval=1).lease_seconds == 300
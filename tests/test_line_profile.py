@@ -0,0 +1,54 @@
+import asyncio
+import uuid
+from app.config import settings
+from app.utils.line_profile import get_line_profile
+from app.utils.singleflight import single_flight_stats
+
+
+def new_line_user_id() -> str:
+    return f"U{uuid.uuid4().hex}"
+
+
+async def test_profile_is_cached(line_stub):
+    line_user_id = new_line_user_id()
+
+    first = await get_line_profile(1, line_user_id, "test-token")
+    second = await get_line_profile(1, line_user_id, "test-token")
+
+    assert first.display_name == f"LINE {line_user_id[-6:]}"
+    assert second is first
+    assert line_stub.stats["profile.requests"] == 1
+
+
+async def test_not_found_is_cached_with_its_own_ttl(line_stub, monkeypatch):
+    monkeypatch.setattr(settings, "LINE_PROFILE_NOT_FOUND_TTL", 0.1)
+    missing = new_line_user_id()
+    found = new_line_user_id()
+    line_stub.not_found_users.add(missing)
+
+    assert await get_line_profile(1, missing, "test-token") is None
+    assert await get_line_profile(1, missing, "test-token") is None
+    assert await get_line_profile(1, found, "test-token") is not None
+    assert line_stub.stats["profile.not_found"] == 1
+
+    await asyncio.sleep(0.15)
+
+    # 查無資料的快取已過期，找到的個人資料仍以 LINE_PROFILE_CACHE_TTL 快取
+    assert await get_line_profile(1, missing, "test-token") is None
+    assert await get_line_profile(1, found, "test-token") is not None
+    assert line_stub.stats["profile.not_found"] == 2
+    assert line_stub.stats["profile.requests"] == 3
+
+
+async def test_concurrent_lookups_share_one_request(line_stub):
+    line_stub.config["latency_ms"] = 50
+    line_user_id = new_line_user_id()
+    before = single_flight_stats()["line_profile"]
+
+    profiles = await asyncio.gather(*(get_line_profile(1, line_user_id, "test-token") for _ in range(10)))
+
+    after = single_flight_stats()["line_profile"]
+    assert len({id(profile) for profile in profiles}) == 1
+    assert line_stub.stats["profile.requests"] == 1
+    assert after["executed"] - before["executed"] == 1
+    assert after["coalesced"] - before["coalesced"] == 9
@@ -0,0 +1,48 @@
+import asyncio
+import bcrypt
+from sqlalchemy.future import select
+from app.database import SessionLocal
+from app.models.system_setting import SystemSetting
+from app.utils import password
+from app.utils.password import PasswordPolicy, needs_rehash
+
+
+def test_needs_rehash_when_cost_differs(monkeypatch):
+    monkeypatch.setattr(password.password_policy, "rounds", 5)
+
+    assert needs_rehash(bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=4)).decode())
+    assert needs_rehash(bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=6)).decode())
+    assert not needs_rehash(bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=5)).decode())
+    assert needs_rehash("not-a-bcrypt-hash")
+
+
+def test_measure_stays_within_bounds():
+    policy = PasswordPolicy(rounds=12, min_rounds=4, max_rounds=6)
+
+    assert policy.measure(target_ms=0) == 4
+    assert policy.measure(target_ms=60_000) == 6
+
+
+async def test_workers_share_first_calibration(monkeypatch):
+    workers = [PasswordPolicy(rounds=12, min_rounds=4, max_rounds=16) for _ in range(3)]
+    for measured, policy in zip([11, 13, 14], workers):
+        monkeypatch.setattr(policy, "measure", lambda target_ms, measured=measured: measured)
+
+    async def calibrate(policy):
+        async with SessionLocal() as session:
+            return await policy.calibrate(session, target_ms=250)
+
+    # 同時啟動：各自量測，但只有第一個寫入的結果生效
+    results = await asyncio.gather(*(calibrate(policy) for policy in workers))
+
+    assert len(set(results)) == 1
+    assert {policy.rounds for policy in workers} == set(results)
+    async with SessionLocal() as session:
+        result = await session.execute(select(SystemSetting.value).filter(
+            SystemSetting.key == PasswordPolicy.SETTING_KEY))
+        assert result.scalar_one() == str(results[0])
+
+    # 之後啟動的 worker 直接讀取共用的結果
+    late = PasswordPolicy(rounds=12, min_rounds=4, max_rounds=16)
+    monkeypatch.setattr(late, "measure", lambda target_ms: 4)
+    assert await calibrate(late) == results[0]
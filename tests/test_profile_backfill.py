@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+from sqlalchemy.future import select
+from app.database import SessionLocal
+from app.models.account import Account
+from app.models.user import User
+from app.tasks.profile_backfill import backfill_profiles
+
+MODIFIED_AT = datetime(2024, 1, 1, 12, 0, 0)
+
+
+async def seed_users(account_id: int, count: int, **values) -> list[int]:
+    values.setdefault("modified_at", MODIFIED_AT)
+    rows = [{"account_id": account_id, "line_user_id": f"U{uuid.uuid4().hex}", **values} for _ in range(count)]
+    async with SessionLocal() as session:
+        result = await session.execute(insert(User).returning(User.id), rows)
+        ids = list(result.scalars())
+        await session.commit()
+    return ids
+
+
+async def get_users(ids: list[int]) -> list:
+    query = select(User.id, User.line_user_id, User.user_name, User.picture_url, User.profile_synced_at,
+                   User.modified_at).filter(User.id.in_(ids)).order_by(User.id)
+    async with SessionLocal() as session:
+        result = await session.execute(query)
+        return result.all()
+
+
+async def test_backfill_pages_all_users(account, line_stub):
+    ids = await seed_users(account.id, 5)
+
+    updated, failed = await backfill_profiles(batch_size=2, batch_sleep=0)
+
+    assert (updated, failed) == (5, 0)
+    assert line_stub.stats["profile.requests"] == 5
+    for user in await get_users(ids):
+        assert user.user_name == f"LINE {user.line_user_id[-6:]}"
+        assert user.picture_url.endswith(user.line_user_id)
+        assert user.profile_synced_at is not None
+        # 填入姓名與大頭貼是實際變更，增量同步需要取得
+        assert user.modified_at > MODIFIED_AT
+
+    # 已同步的使用者不會重複查詢
+    assert await backfill_profiles(batch_size=2, batch_sleep=0) == (0, 0)
+    assert line_stub.stats["profile.requests"] == 5
+
+
+async def test_resync_without_changes_keeps_modified_at(account, line_stub):
+    ids = await seed_users(account.id, 3)
+    await backfill_profiles(batch_size=10, batch_sleep=0)
+
+    # 個人資料到期重新同步，LINE 回傳相同內容
+    async with SessionLocal() as session:
+        await session.execute(update(User).where(User.id.in_(ids))
+                              .values(profile_synced_at=datetime.now() - timedelta(days=30), modified_at=MODIFIED_AT))
+        await session.commit()
+
+    assert await backfill_profiles(batch_size=10, batch_sleep=0) == (3, 0)
+    for user in await get_users(ids):
+        assert user.profile_synced_at > datetime.now() - timedelta(days=1)
+        assert user.modified_at == MODIFIED_AT
+
+
+async def test_backfill_keeps_existing_values(account, line_stub):
+    named_id, = await seed_users(account.id, 1, user_name="手動填寫")
+    blocked_id, = await seed_users(account.id, 1, picture_url="https://example.com/old.png")
+    blocked, = await get_users([blocked_id])
+    line_stub.not_found_users.add(blocked.line_user_id)
+
+    updated, failed = await backfill_profiles(batch_size=10, batch_sleep=0)
+
+    assert (updated, failed) == (2, 0)
+    named, blocked = await get_users([named_id, blocked_id])
+    assert named.user_name == "手動填寫"
+    assert named.picture_url is not None
+    # 查無個人資料：保留原本的大頭貼，只更新同步時間
+    assert blocked.user_name is None
+    assert blocked.picture_url == "https://example.com/old.png"
+    assert blocked.profile_synced_at is not None
+    assert named.modified_at > MODIFIED_AT
+    assert blocked.modified_at == MODIFIED_AT
+
+
+async def test_backfill_skips_recent_and_disabled(account, line_stub):
+    recent_ids = await seed_users(account.id, 2, profile_synced_at=datetime.now() - timedelta(days=1))
+    stale_ids = await seed_users(account.id, 1, profile_synced_at=datetime.now() - timedelta(days=30))
+    async with SessionLocal() as session:
+        disabled = Account(email="disabled@example.com", password="x", channel_token="test-token", status=False)
+        session.add(disabled)
+        await session.flush()
+        disabled_id = disabled.id
+        await session.commit()
+    await seed_users(disabled_id, 2)
+
+    updated, failed = await backfill_profiles(batch_size=10, batch_sleep=0)
+
+    assert (updated, failed) == (1, 0)
+    stale, = await get_users(stale_ids)
+    assert stale.user_name is not None
+    assert all(user.user_name is None for user in await get_users(recent_ids))
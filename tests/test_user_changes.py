@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.future import select
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.user_tombstone import UserTombstone
+from app.tasks.stale_users import prune_user_tombstones
+from app.utils.cursor import encode_cursor, decode_cursor
+
+
+async def seed(account_id: int):
+    an_hour_ago = datetime.utcnow() - timedelta(hours=1)
+    async with SessionLocal() as session:
+        await session.execute(insert(User), [
+            {"account_id": account_id, "line_user_id": "U0001", "modified_at": an_hour_ago}])
+        await session.execute(insert(UserTombstone), [
+            {"user_id": 100, "account_id": account_id, "line_user_id": "U0100",
+             "deleted_at": datetime.utcnow() - timedelta(days=40)},
+            {"user_id": 101, "account_id": account_id, "line_user_id": "U0101", "deleted_at": an_hour_ago},
+        ])
+        await session.commit()
+
+
+async def test_changes_cursor_survives_idle_periods(api, account, auth_headers):
+    await seed(account.id)
+
+    first = await api.get("/api/users/changes", headers=auth_headers)
+    assert first.status_code == 200
+    data = first.json()["data"]
+    assert [user["line_user_id"] for user in data["changes"]] == ["U0001"]
+    assert [row["line_user_id"] for row in data["deleted"]] == ["U0100", "U0101"]
+    # 刪除紀錄已讀完，位置推進到本次的上限
+    assert decode_cursor(data["next_cursor"])["deleted"][0] > datetime.utcnow() - timedelta(minutes=1)
+
+    second = await api.get("/api/users/changes", params={"since": data["next_cursor"]}, headers=auth_headers)
+    assert second.status_code == 200
+    assert second.json()["data"]["changes"] == []
+    assert second.json()["data"]["deleted"] == []
+
+
+async def test_expired_cursor_requires_resync(api, account, auth_headers):
+    cursor = encode_cursor({"users": None, "deleted": (datetime.utcnow() - timedelta(days=31), 1)})
+
+    response = await api.get("/api/users/changes", params={"since": cursor}, headers=auth_headers)
+
+    assert response.status_code == 410
+    assert "since" in response.json()["errors"]
+
+
+async def test_prune_removes_only_expired_tombstones(account):
+    await seed(account.id)
+
+    assert await prune_user_tombstones(batch_size=1, batch_sleep=0) == 1
+
+    async with SessionLocal() as session:
+        result = await session.execute(select(UserTombstone.user_id))
+        assert [row.user_id for row in result] == [101]